@@ -4,16 +4,33 @@ This module handles the login process.
 """
 
 # Built-in Modules
-from itertools import groupby
 import sys
 
 # Third-party Packages
 import stdiomask
 
 # Custom Packages
-from worktime.app import admin, employee, title, utility, validations
+from worktime.app import (admin, employee, messages, recalc, session,
+                          title, utility, validations)
 from worktime.app.utility import print_in_colour as colour
-from worktime.worksheets import credentials, entitlements, requests
+from worktime.worksheets import clocklog, credentials, journal, scheduler
+
+
+def load_credentials():
+    """Read the login credentials. Run a while loop until the worksheets
+    can be reached, asking the user to try again meanwhile.
+
+    Returns:
+        Credentials: The login_credentials worksheet.
+    """
+    while True:
+        try:
+            return credentials.Credentials()
+        except Exception as error:
+            if not journal.is_unreachable(error):
+                raise
+            print(messages.unreachable())
+            input(colour("CYAN", "Press enter to try again.\n"))
 
 
 def login():
@@ -21,8 +38,7 @@ def login():
     Run a while loop until the user enters a valid ID and password.
     """
     help_typed = False
-    all_creds = credentials.Credentials().credentials
-    all_ids = [id for id, pw in all_creds]
+    creds = load_credentials()
 
     while True:
         print("\nPlease enter " + colour("CYAN", "Employee ID") + ".")
@@ -39,35 +55,30 @@ def login():
 
         print(f"\nPlease enter {colour('CYAN', 'Password')}.")
         pw_ = stdiomask.getpass(prompt=colour("CYAN", ">>>\n"))
-        correct_pw = get_pw(id_, all_creds)
+        correct_pw = creds.get_password(id_)
 
-        if validations.validate_login(id_, pw_, all_ids, correct_pw):
+        if validations.validate_login(pw_, correct_pw):
+            new_hash = validations.rehash_password(pw_, correct_pw)
+            if new_hash:
+                creds.update_password(id_, new_hash)
             if id_ == "ADMIN":
                 title.display_admin_title()
                 admin.ReviewRequests()
                 admin.admin_main()
                 break
-            title.display_employee_title(id_)
-            employee.employee_main(id_)
+            try:
+                user = session.Session(id_)
+            except Exception as error:
+                # Ask for the login again rather than crash.
+                if not journal.is_unreachable(error):
+                    raise
+                print(messages.unreachable())
+                continue
+            title.display_employee_title(user.profile["first_name"])
+            employee.employee_main(user)
             break
 
 
-def get_pw(id_, data):
-    """Returns a matching password for the ID.
-
-    Args:
-        id_ str: An employee ID.
-        data list: A list containing employee ID and password.
-    Returns:
-        str: The matching password for the ID.
-    """
-    for credential in data:
-        if id_ in credential:
-            index = data.index(credential)
-            password = data[index][1]
-            return password
-
-
 def help_():
     """Print application information."""
     text = f"""
@@ -92,55 +103,6 @@ additional help, please email me at kwak.sejung@gmail.com
     utility.display_table([[text]])
 
 
-def calc_req_hours():
-    """Calculate absence request hours from absence_requests worksheet.
-    This function is for updating taken hours.
-    """
-    all_req = requests.Requests().requests
-    all_req.sort(key=lambda req: req[1])
-    groups = groupby(all_req, lambda req: req[1])
-    new_list = [[item for item in data] for (key, data) in groups]
-    entitle_list = []
-    for each_employee in new_list:
-        taken = 0
-        planned = 0
-        pending = 0
-        for each_req in each_employee:
-            start_date = utility.convert_date(each_req[2])
-            tday = utility.GetDatetime().tday()
-            if ((start_date - tday).days <= 0 and
-                    each_req[-2] == "True" and
-                    each_req[-1] == "False"):
-                taken += int(float(each_req[-4]) * 8)
-            elif ((start_date - tday).days > 0 and
-                    each_req[-2] == "True" and
-                    each_req[-1] == "False"):
-                planned += int(float(each_req[-4]) * 8)
-            elif ((start_date - tday).days > 0 and
-                    each_req[-2] != "False" and
-                    each_req[-1] == "False"):
-                pending += int(float(each_req[-4]) * 8)
-            unallocated = 200 - (taken + planned + pending)
-            each_entitle = [each_req[1], 200, taken,
-                            planned, pending, unallocated]
-        entitle_list.append(each_entitle)
-    return entitle_list
-
-
-def update_entitlements():
-    """Update entitlements hours to entitlements worksheet."""
-    ent_class = entitlements.Entitlements()
-    ents = ent_class.entitlements
-    updated_ents = calc_req_hours()
-    if ents == updated_ents:
-        return
-    for ent in ents:
-        for updated_ent in updated_ents:
-            if ent[0] == updated_ent[0]:
-                ents[ents.index(ent)] = updated_ent
-    ent_class.worksheet.update("A2:F11", ents)
-
-
 def main():
     """In the try block, call functions to update entitlement hours,
     display the title and a login prompt.
@@ -148,7 +110,14 @@ def main():
     pressing Ctrl + C, and exit the application.
     """
     try:
-        update_entitlements()
+        clocklog.start_compactor()
+        try:
+            with scheduler.background():
+                recalc.update_entitlements()
+        except Exception as error:
+            # Skipped: the next start brings the entitlements up to date.
+            if not journal.is_unreachable(error):
+                raise
         title.display_main_title()
         login()
     except KeyboardInterrupt:
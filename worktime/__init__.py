@@ -1,5 +1,8 @@
 """Work Time project package.
 
+Modules:
+    config: Application settings read from environment variables.
+
 Sub-packages:
     app: It has modules and Functions to perform the application.
     worksheets: It has modules that CRUD worksheets.
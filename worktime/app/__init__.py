@@ -1,14 +1,17 @@
 """Work Time app package.
-This package contains 7 modules that display data and take user input.
+This package contains 10 modules that display data and take user input.
 
 Modules:
     admin: Perform admin portal.
+    archival: Run the yearly archive job.
     employee: Perform employee portal.
     menu: Display menus in a box.
          Admin and employee portal main menu,
          Absence paid/unpaid menu and Update clock in/out menu.
     messages: Collection of the most used messages.
              Functions return the messages as a string.
+    recalc: Keep absence entitlements in line with absence requests.
+    session: Keep the logged-in employee's data in memory.
     title: Collection of title arts.
     utility: Functions related to font colours, date, time and table display.
     validations: Functions that validate user input.
@@ -17,8 +17,8 @@ from worktime.app.validations import (validate_choice_letter,
                                       validate_choice_number,
                                       validate_days, validate_date,
                                       validate_unpaid_days)
-from worktime.worksheets import (clockings, credentials, employees,
-                                 entitlements, requests)
+from worktime.worksheets import (batch, clocklog, clockings, credentials,
+                                 employees, entitlements, requests)
 
 
 def admin_main():
@@ -28,51 +28,38 @@ def admin_main():
         3. Add Employee Absence
         4. Update Clock Card
         5. Exit
-    Run a while loop until the user inputs a valid number.
+    Each option returns to the menu loop when it is done.
     """
-    while True:
-        menu.admin_menu()
-        answer = input(colour("CYAN", ">>>\n")).strip()
-        utility.clear()
-        if validate_choice_number(answer, range(1, 6)):
-            break
-
-    if answer == "1":
-        ReviewRequests().handle_request()
-    elif answer == "2":
-        ReviewAttendace()
-    elif answer == "3":
-        AddAbsence()
-    elif answer == "4":
-        update_clocking()
-    else:
-        title.display_goodbye()
-        sys.exit()
+    options = {"1": lambda: ReviewRequests().handle_request(),
+               "2": ReviewAttendace, "3": AddAbsence, "4": update_clocking}
+    menu.run_portal(menu.admin_menu, options)
 
 
 class ReviewRequests:
     """Represent Review Requests menu option."""
 
     def __init__(self):
-        self.all_requests = requests.Requests().requests
-        self.all_employees = employees.Employees().employees
+        self.request_sheet = requests.Requests()
+        self.employee_sheet = employees.Employees()
         self.new_request = self.get_new_requests()
         self.new_request_notification()
 
     def get_new_requests(self):
         """Retrieve data that meets conditions: start date is in the future,
-        not approved or rejected, not cancelled.
+        not approved or rejected, not cancelled. Only the pending requests
+        are read, from the status index.
 
         Returns:
-            list: A list of lists containing new request data.
+            list: A list of lists containing new request data, sorted by
+                  the employee ID.
         """
-        today = utility.GetDatetime().tday()
+        today = utility.GetDatetime().tday().toordinal()
         new_requests = []
-        for item in self.all_requests:
-            date_ = convert_date(item[2])
-            if ((date_ - today).days > 0 and
-                    item[-2] == "/" and item[-1] == "False"):
-                new_requests.append(item)
+        for items in self.request_sheet.get_pending().values():
+            for item in items:
+                date_ = utility.to_ordinal(item[2])
+                if date_ is not None and date_ > today:
+                    new_requests.append(item)
         return new_requests
 
     def new_request_notification(self):
@@ -106,15 +93,12 @@ class ReviewRequests:
         menu_or_quit()
 
     def sort_new_request(self):
-        """Sort and combine lists with the same employee ID to display
-        new absence requests.
+        """Combine lists with the same employee ID to display new absence
+        requests. get_new_requests returns them sorted by the ID.
 
         Returns:
             new_req_list list: A list sorted by the employee ID.
         """
-        # Source: mouad's answer on Stack Overflow
-        # https://stackoverflow.com/questions/4174941
-        self.new_request.sort(key=lambda req: req[1])
         # Source: Robert Rossney's answer on Stack Overflow
         # https://stackoverflow.com/questions/5695208
         groups = groupby(self.new_request, lambda req: req[1])
@@ -128,12 +112,9 @@ class ReviewRequests:
                     "Start Time", "End Time", "Duration"])
         for new_request in sorted_new_request:
             table = []
+            fullname = self.employee_sheet.get_fullname(new_request[0][1])
             for item in new_request:
-                item = item[:7]
-                employee_id = item.pop(1)
-                fullname = get_fullname(employee_id, self.all_employees)
-                item[-1] = f"{item[-1]} Day(s)"
-                table.append(item)
+                table.append((item[0], *item[2:6], f"{item[6]} Day(s)"))
             if len(table) > 1:
                 print(f"New requests from {fullname}")
             else:
@@ -154,9 +135,7 @@ class ReviewRequests:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).strip()
             if answer.upper() == "MENU":
-                utility.clear()
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -177,9 +156,7 @@ class ReviewRequests:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).upper().strip()
             if answer == "MENU":
-                utility.clear()
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -199,7 +176,7 @@ class ReviewRequests:
             if request[0] == request_id:
                 (_, id_, fromdate, todate, fromtime,
                  totime, days, *_) = request
-                fullname = get_fullname(id_, self.all_employees)
+                fullname = self.employee_sheet.get_fullname(id_)
                 if fromtime:
                     period = f"{fromtime} - {totime}"
                 else:
@@ -232,18 +209,17 @@ class ReviewRequests:
         print("Processing...")
         employee_id, absence_days = self.get_request_details(request_id)
 
-        # Update absence_requests worksheet
         request_sheet = requests.Requests()
-        requests_row_index = int(request_id)
         hours = int(float(absence_days) * 8)
-        request_sheet.update_approved(requests_row_index, decision)
-
-        # Update entitlements worksheet
         entitle_sheet = entitlements.Entitlements(employee_id)
-        if decision == "APPROVE":
-            entitle_sheet.update_hours(hours, "pending_to_planned")
-        else:
-            entitle_sheet.update_hours(hours, "pending_to_unallocated")
+
+        # Write the decision and the hours in one batch update.
+        with batch.Batch():
+            request_sheet.update_approved(request_id, decision)
+            if decision == "APPROVE":
+                entitle_sheet.move(hours, "pending", "planned")
+            else:
+                entitle_sheet.move(hours, "pending", "unallocated")
         print(colour("GREEN", "\nData updated successfully.\n"))
         time.sleep(2)
 
@@ -267,8 +243,10 @@ class ReviewAttendace:
     """Represent Review Attendace menu option."""
 
     def __init__(self):
-        self.clock_cards = clockings.Clockings().clockings
-        self.all_employees = employees.Employees().employees
+        # Bring the worksheet up to date with this terminal's clock log.
+        clocklog.get_log().compact()
+        self.clock_sheet = clockings.Clockings()
+        self.employee_sheet = employees.Employees()
         self.get_attendance_date()
 
     def get_attendance_date(self):
@@ -288,8 +266,7 @@ class ReviewAttendace:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -307,15 +284,10 @@ class ReviewAttendace:
         converted_date = today if date_ is None else convert_date(date_)
         text = "today" if date_ is None else date_
         headers = ["Name", "Date", "Clock In", "Clock Out"]
-        table = []
-        for clocking in self.clock_cards:
-            ee_id, date, *_ = clocking
-            if convert_date(date) == converted_date:
-                for ee_ in self.all_employees:
-                    if ee_id == ee_[0]:
-                        # Replace the employee ID with full name
-                        clocking[0] = f"{ee_[1]} {ee_[2]}"
-                table.append(clocking)
+        clock_cards = self.clock_sheet.get_day(
+            converted_date.strftime("%d/%m/%Y"))
+        # Views with the employee ID replaced by the full name.
+        table = self.employee_sheet.with_names(clock_cards)
         if table:
             print(f"Clock cards for {text}")
             utility.display_table(table, headers)
@@ -327,7 +299,7 @@ class AddAbsence:
     """Represent Add Employee Absence menu option."""
 
     def __init__(self):
-        self.all_employees = employees.Employees().employees
+        self.employee_sheet = employees.Employees()
         self.get_absence_data()
 
     def get_absence_data(self):
@@ -336,7 +308,7 @@ class AddAbsence:
         """
         while True:
             self.ee_id = get_employee_id("to add absence.")
-            self.fullname = get_fullname(self.ee_id, self.all_employees)
+            self.fullname = self.employee_sheet.get_fullname(self.ee_id)
             entitlements_sheet = entitlements.Entitlements(self.ee_id)
             self.entitle_data = entitlements_sheet.get_entitlements()
             self.display_entitle_data()
@@ -351,10 +323,11 @@ class AddAbsence:
 
             confirm_update = self.get_confirm_absence()
             if confirm_update == "Y":
-                if self.absence_type == "1":
-                    # If paid time off, update entitlements hours.
-                    self.add_entitlement()
-                self.add_absence()
+                with batch.Batch():
+                    if self.absence_type == "1":
+                        # If paid time off, update entitlements hours.
+                        self.add_entitlement()
+                    self.add_absence()
             else:
                 print(colour("GREEN", "No changes were made."))
             print("\nReturning to the beginning...")
@@ -411,8 +384,7 @@ class AddAbsence:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -435,8 +407,7 @@ class AddAbsence:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -467,9 +438,7 @@ class AddAbsence:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).strip()
             if answer.upper() == "MENU":
-                utility.clear()
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -497,9 +466,7 @@ class AddAbsence:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).strip()
             if answer.upper() == "MENU":
-                utility.clear()
-                admin_main()
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -542,9 +509,8 @@ class AddAbsence:
         print(f"Updating {self.fullname}'s absence details...\n")
         time.sleep(1)
         req_sheet = requests.Requests(self.ee_id)
-        req_id = req_sheet.generate_req_id()
         start_time, end_time, days, *_ = self.generate_absence_summary()
-        data = ([req_id, self.ee_id, self.start_date, self.end_date,
+        data = (["", self.ee_id, self.start_date, self.end_date,
                 start_time, end_time, days, note, "True", "False"])
         req_sheet.add_request(data)
         print(colour("GREEN", self.fullname + "\'s absence details " +
@@ -559,9 +525,9 @@ class AddAbsence:
         iso_start_date = convert_date(self.start_date)
         today = utility.GetDatetime().tday()
         if int((iso_start_date - today).days) > 0:
-            entitle_sheet.update_hours(hours, "unallocated_to_planned")
+            entitle_sheet.move(hours, "unallocated", "planned")
         else:
-            entitle_sheet.update_hours(hours, "unallocated_to_taken")
+            entitle_sheet.move(hours, "unallocated", "taken")
         print(colour("GREEN", self.fullname + "\'s absence " +
                      "entitlements updated successfully.\n"))
 
@@ -583,8 +549,7 @@ def get_employee_id(text):
         answer = input(colour("CYAN", ">>>\n")).upper().strip()
         utility.clear()
         if answer == "MENU":
-            admin_main()
-            break
+            raise menu.BackToMenu()
         if answer == "QUIT":
             title.display_goodbye()
             sys.exit()
@@ -600,11 +565,11 @@ def update_clocking():
     clock in or out, time) and update accordingly.
     Run a while loop until user types menu or quit.
     """
-    all_employees = employees.Employees().employees
+    employee_sheet = employees.Employees()
     while True:
         id_ = get_employee_id("to update a clock card.")
         date_ = get_date()
-        fullname = get_fullname(id_, all_employees)
+        fullname = employee_sheet.get_fullname(id_)
         data = clockings.Clockings(id_).get_one_clocking(date_)
         in_or_out = clock_in_or_out(id_, date_, fullname, data)
         time_ = get_time(data, date_, in_or_out)
@@ -640,8 +605,7 @@ def get_date():
         answer = input(colour("CYAN", ">>>\n")).strip()
         utility.clear()
         if answer.upper() == "MENU":
-            admin_main()
-            break
+            raise menu.BackToMenu()
         if answer.upper() == "QUIT":
             title.display_goodbye()
             sys.exit()
@@ -685,9 +649,7 @@ def clock_in_or_out(id_, date_, fullname, data):
         print(f"({messages.to_menu()})")
         answer = input(colour("CYAN", ">>>\n")).strip()
         if answer.upper() == "MENU":
-            utility.clear()
-            admin_main()
-            break
+            raise menu.BackToMenu()
         if answer.upper() == "QUIT":
             title.display_goodbye()
             sys.exit()
@@ -718,16 +680,15 @@ def get_time(data, date_, type_):
         print(f"({messages.to_menu()})")
         answer = input(colour("CYAN", ">>>\n")).strip()
         if answer.upper() == "MENU":
-            utility.clear()
-            admin_main()
-            break
+            raise menu.BackToMenu()
         if answer.upper() == "QUIT":
             title.display_goodbye()
             sys.exit()
         elif validations.validate_time(answer):
-            tday = utility.GetDatetime().tday()
+            now = utility.GetDatetime()
+            tday = now.tday()
             target_date = convert_date(date_)
-            current_time = utility.GetDatetime().now_time()
+            current_time = now.now_time()
             target_time = convert_time(answer)
             if target_date == tday and target_time > current_time:
                 print(colour("RED", "Unable to set clocking time " +
@@ -776,25 +737,9 @@ def get_confirm_clocking(id_, date_, in_out, time_, fullname):
             return answer
 
 
-def get_fullname(id_, employee_list):
-    """Returns an employee's full name.
-
-    Args:
-        id_: An employee ID.
-        employee_list: A list of all employees
-    """
-    for employee in employee_list:
-        if employee[0] == id_:
-            fullname = f"{employee[1]} {employee[2]}"
-    return fullname
-
-
 def menu_or_quit():
     """Ask the user if they want to go back to the menu or quit.
     Run a while loop until the user inputs a valid answer.
-
-    Returns:
-        str: The user input - menu or quit.
     """
     while True:
         print(messages.to_menu())
@@ -802,7 +747,6 @@ def menu_or_quit():
         utility.clear()
         if validate_choice_letter(answer, ["MENU", "QUIT"]):
             if answer == "MENU":
-                admin_main()
-                break
+                return
             title.display_goodbye()
             sys.exit()
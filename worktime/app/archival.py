@@ -0,0 +1,28 @@
+"""Archival module
+
+This module runs the yearly archive job: it brings the entitlements up
+to date, so every request that has been taken is counted, and then moves
+the closed periods of the clockings and absence_requests worksheets into
+their yearly partitions. Terminals can keep running meanwhile:
+    python -m worktime.app.archival
+"""
+
+# Custom Packages
+from worktime.app import recalc, utility
+from worktime.worksheets import archive, clocklog, scheduler
+
+
+def main():
+    """Fold the clock event log into the clockings, update entitlements,
+    archive the closed periods and print how many rows were moved.
+    """
+    with scheduler.background():
+        clocklog.get_log().compact()
+        recalc.update_entitlements()
+        moved = archive.archive(utility.GetDatetime().tday())
+    for name, count in moved.items():
+        print(f"{name}: {count} row(s) archived.")
+
+
+if __name__ == "__main__":
+    main()
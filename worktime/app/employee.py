@@ -13,10 +13,10 @@ from worktime.app.utility import get_num_of_weekdays, print_in_colour as colour
 from worktime.app.validations import (validate_choice_letter,
                                       validate_choice_number,
                                       validate_days, validate_date)
-from worktime.worksheets import clockings, entitlements, requests
+from worktime.worksheets import batch
 
 
-def employee_main(id_):
+def employee_main(session):
     """Request a number between 1 and 7, the numbered options.
         1. Clock In
         2. Clock Out
@@ -25,46 +25,29 @@ def employee_main(id_):
         5. Book Absence
         6. Cancel Absence
         7. Exit
-    Run a while loop until the user inputs a valid number.
+    Each option returns to the menu loop when it is done.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
-    while True:
-        menu.employee_menu()
-        choice = input(colour("CYAN", ">>>\n")).strip()
-        utility.clear()
-        if validate_choice_number(choice, range(1, 8)):
-            break
-
-    if choice == "1":
-        clock_in(id_)
-    elif choice == "2":
-        clock_out(id_)
-    elif choice == "3":
-        ViewClockCard(id_)
-    elif choice == "4":
-        display_entitlements(id_)
-    elif choice == "5":
-        BookAbsence(id_)
-    elif choice == "6":
-        CancelAbsence(id_)
-    else:
-        title.display_goodbye()
-        sys.exit()
+    options = {"1": clock_in, "2": clock_out, "3": ViewClockCard,
+               "4": display_entitlements, "5": BookAbsence,
+               "6": CancelAbsence}
+    menu.run_portal(menu.employee_menu, options, session)
 
 
-def clock_in(id_):
+def clock_in(session):
     """Run when the user chooses the clock in option.
     Send the clock in data to the worksheet.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
-    today = utility.GetDatetime().tday_str()
-    clock_in_at = utility.GetDatetime().now_time_str()
-    clock_sheet = clockings.Clockings(id_)
-    clocking = clock_sheet.get_one_clocking()
+    id_ = session.id_
+    now = utility.GetDatetime()
+    today = now.tday_str()
+    clock_in_at = now.now_time_str()
+    clocking = session.get_clocking(today)
     if clocking:
         if clocking["end_time"]:
             clocked_out_at = clocking["end_time"]
@@ -79,17 +62,17 @@ def clock_in(id_):
             answer = check_for_overwrite()
             utility.clear()
             if answer == "Y":
-                clock_sheet.update_clock_in(today, clock_in_at)
+                session.update_clock_in(today, clock_in_at)
                 print(colour("GREEN", "Clock in time has been " +
                       "updated to " + clock_in_at + ".\n"))
             else:
                 print(colour("GREEN", "No changes were made.\n"))
     else:
         data = [id_, today, clock_in_at]
-        clock_sheet.add_clocking(data)
+        session.add_clocking(data)
         print(colour("GREEN", "Successfully clocked in at " +
               clock_in_at + ".\n"))
-    menu_or_quit(id_)
+    menu_or_quit()
 
 
 def check_for_overwrite():
@@ -104,16 +87,17 @@ def check_for_overwrite():
             return answer
 
 
-def clock_out(id_):
+def clock_out(session):
     """Check if there is clocking data for today already and update worksheet.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
-    today = utility.GetDatetime().tday_str()
-    clock_out_at = utility.GetDatetime().now_time_str()
-    clock_sheet = clockings.Clockings(id_)
-    clocking = clock_sheet.get_one_clocking()
+    id_ = session.id_
+    now = utility.GetDatetime()
+    today = now.tday_str()
+    clock_out_at = now.now_time_str()
+    clocking = session.get_clocking(today)
     if clocking:
         if clocking["end_time"]:
             clocked_out_at = clocking["end_time"]
@@ -121,29 +105,28 @@ def clock_out(id_):
                   clocked_out_at + '.'))
             print("To update the clock out time, contact a manager.\n")
         else:
-            clock_sheet.update_clock_out(today, clock_out_at)
+            session.update_clock_out(today, clock_out_at)
             print(colour("GREEN", "Successfully clocked out at " +
                   clock_out_at + ".\n"))
     else:
         data = [id_, today, "", clock_out_at]
-        clock_sheet.add_clocking(data)
+        session.add_clocking(data)
         print(colour("RED", "No clock in data for today."))
         print("To add the clock in time, contact a manager.\n")
         print(colour("GREEN", "Successfully clocked out at"),
               colour("GREEN", clock_out_at + ".\n"))
-    menu_or_quit(id_)
+    menu_or_quit()
 
 
 class ViewClockCard:
     """Represent View Clock Card menu option.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
 
-    def __init__(self, id_):
-        self.id_ = id_
-        self.attendance_data = clockings.Clockings().clockings
+    def __init__(self, session):
+        self.session = session
         self.today = utility.GetDatetime().tday_str()
         self.display_attendance()
         self.get_attendance_date()
@@ -161,8 +144,7 @@ class ViewClockCard:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                employee_main(self.id_)
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -189,7 +171,7 @@ class ViewClockCard:
             print(f"No clocking data found for {text}.")
 
     def get_week_clockings(self, date_=None):
-        """Iterate through the sheet to find week's values that match the date.
+        """Look up the session's clockings for the week of the date.
 
         Args:
             date_ str: A DD/MM/YYYY formatted date. Today if none.
@@ -197,42 +179,38 @@ class ViewClockCard:
         date_ = self.today if date_ is None else date_
         date_ = utility.convert_date(date_)
         dates = utility.get_week(date_, "week")
-        result = []
-        for day in dates:
-            for clocking in self.attendance_data:
-                ee_id, date, *_ = clocking
-                if ee_id == self.id_ and date == day:
-                    result.append(clocking)
-        return result
+        self.session.load_clockings(dates)
+        return [self.session.clockings[day] for day in dates
+                if day in self.session.clockings]
 
 
-def display_entitlements(id_):
+def display_entitlements(session):
     """Display absence entitlements for the logged in employee.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
     this_year = utility.GetDatetime().now_year()
-    data = entitlements.Entitlements(id_).get_entitlements()
+    data = session.entitlements
     table = [[item for item in data]]
     headers = ["Total Hours", "Taken", "Planned", "Pending", "Unallocated"]
     print(f"Absence entitlements for {this_year}.")
     utility.display_table(table, headers)
     print("\n", end="")
-    menu_or_quit(id_)
+    menu_or_quit()
 
 
 class BookAbsence:
     """Represent Book Absence menu option.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
 
-    def __init__(self, id_):
-        self.id_ = id_
-        self.unallocated = entitlements.Entitlements(
-            id_).get_entitlements()[-1]
+    def __init__(self, session):
+        self.session = session
+        self.id_ = session.id_
+        self.unallocated = session.entitlements[-1]
         self.avail_hours = int(self.unallocated)
         self.book_absence()
 
@@ -251,8 +229,11 @@ class BookAbsence:
 
             self.confirm = self.get_confirm_request()
             if self.confirm == "Y":
-                self.add_absence_request()
-                self.add_pending_hours()
+                # The request is written straight away to get its ID;
+                # the hours follow when the batch ends.
+                with batch.Batch():
+                    self.add_absence_request()
+                    self.add_pending_hours()
                 hours = self.generate_absence_summary()[2] * 8
                 self.avail_hours -= hours
             else:
@@ -261,7 +242,7 @@ class BookAbsence:
             time.sleep(3)
             utility.clear()
         self.display_avail_hours()
-        menu_or_quit(self.id_)
+        menu_or_quit()
 
     def generate_absence_summary(self):
         """Generate absence start time, end time, days, depending on
@@ -316,8 +297,7 @@ class BookAbsence:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                employee_main(self.id_)
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -346,17 +326,16 @@ class BookAbsence:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).strip()
             if answer.upper() == "MENU":
-                utility.clear()
-                employee_main(self.id_)
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
             elif validate_date(answer):
                 request_date = utility.convert_date(answer)
-                today = utility.GetDatetime().tday()
+                now = utility.GetDatetime()
+                today = now.tday()
                 request_year = request_date.year
-                this_year = utility.GetDatetime().now_year()
+                this_year = now.now_year()
                 if (request_date - today).days <= 0:
                     print(colour("RED", "\nPlease note holidays must be " +
                           "booked in advance."))
@@ -382,9 +361,7 @@ class BookAbsence:
             print(f"({messages.to_menu()})")
             answer = input(colour("CYAN", ">>>\n")).strip()
             if answer.upper() == "MENU":
-                utility.clear()
-                employee_main(self.id_)
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -416,13 +393,11 @@ class BookAbsence:
     def add_absence_request(self):
         """Update the absence_requests worksheet."""
         print("Submitting your absence request...\n")
-        request_sheet = requests.Requests()
-        req_id = request_sheet.generate_req_id()
         today = utility.GetDatetime().tday_str()
         start_time, end_time, days, *_ = self.generate_absence_summary()
-        data = ([req_id, self.id_, self.start_date, self.end_date,
+        data = (["", self.id_, self.start_date, self.end_date,
                  start_time, end_time, days, today, "/", "False"])
-        request_sheet.add_request(data)
+        self.session.add_request(data)
         print(colour("GREEN", "Absence request submitted successfully."))
         time.sleep(3)
 
@@ -430,8 +405,7 @@ class BookAbsence:
         """Update the entitlements worksheet."""
         print("\nUpdating absence entitlements...\n")
         hours = self.generate_absence_summary()[2] * 8
-        (entitlements.Entitlements(self.id_)
-                     .update_hours(hours, "unallocated_to_pending"))
+        self.session.move_hours(hours, "unallocated", "pending")
         print(colour("GREEN", "Absence entitlements updated successfully."))
 
 
@@ -439,15 +413,21 @@ class CancelAbsence:
     """Represent cancel Absence menu option.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        session Session: The logged-in employee's session.
     """
 
-    def __init__(self, id_):
-        self.id_ = id_
-        self.absence_sheet = requests.Requests(id_)
-        self.absences = self.absence_sheet.get_cancellable_absence()
+    def __init__(self, session):
+        self.session = session
+        self.id_ = session.id_
+        # An admin may have approved or rejected requests since login.
+        self.session.load_requests()
         self.cancel_absence()
 
+    @property
+    def absences(self):
+        """list: The session's planned and pending absence requests."""
+        return self.session.open_requests
+
     def cancel_absence(self):
         """Get absence request data from a user.
         Run a while loop until no cancellable absence left.
@@ -457,25 +437,19 @@ class CancelAbsence:
             self.confirm = self.get_confirm_cancel()
             if self.confirm == "Y":
                 self.update_cancel_absence()
-                for absence in self.absences:
-                    if self.req_id == absence[0]:
-                        self.absences.pop(self.absences.index(absence))
             else:
                 print(colour("GREEN", "No Absence cancelled."))
             print("\nReturning to the beginning...")
             time.sleep(3)
             utility.clear()
         print(colour("RED", "No planned/pending absence to cancel.\n"))
-        menu_or_quit(self.id_)
+        menu_or_quit()
 
     def display_allocated_absences(self):
         """Display absence requests that can be cancelled by the user."""
         table = []
         for item in self.absences:
-            item = item[:7]
-            item.pop(1)
-            item[-1] = f"{item[-1]} day(s)"
-            table.append(item)
+            table.append((item[0], *item[2:6], f"{item[6]} day(s)"))
         headers = (["ID", "Start Date", "End Date",
                     "Start Time", "End Time", "Duration"])
         utility.display_table(table, headers)
@@ -494,8 +468,7 @@ class CancelAbsence:
             answer = input(colour("CYAN", ">>>\n")).strip()
             utility.clear()
             if answer.upper() == "MENU":
-                employee_main(self.id_)
-                break
+                raise menu.BackToMenu()
             if answer.upper() == "QUIT":
                 title.display_goodbye()
                 sys.exit()
@@ -526,32 +499,24 @@ class CancelAbsence:
         """Update absence_requests and entitlements worksheets."""
         utility.clear()
         print("Processing your request...\n")
-        for item in self.absences:
-            if self.req_id == item[0]:
-                cancel_row = int(item[0])
-        self.absence_sheet.update_cancelled(cancel_row)
-        for absence in self.absences:
-            if self.req_id == absence[0]:
-                list_index = self.absences.index(absence)
-        absence_days = self.absences[list_index][6]
-        absence_hours = int(float(absence_days) * 8)
-        is_approved = self.absences[list_index][8]
-        entitle_sheet = entitlements.Entitlements(self.id_)
-        if is_approved == "True":
-            entitle_sheet.update_hours(absence_hours, "planned_to_unallocated")
-        else:
-            entitle_sheet.update_hours(absence_hours, "pending_to_unallocated")
+        # Read the request again: its approval may have changed meanwhile.
+        request = self.session.get_request(self.req_id)
+        if request is None or request[8] == "False" or request[9] == "True":
+            self.session.load_requests()
+            print(colour("RED", "This absence can no longer be cancelled."))
+            return
+        absence_hours = int(float(request[6]) * 8)
+        is_approved = request[8]
+        with batch.Batch():
+            self.session.cancel_request(self.req_id)
+            bucket = "planned" if is_approved == "True" else "pending"
+            self.session.move_hours(absence_hours, bucket, "unallocated")
         print(colour("GREEN", "Absence cancelled successfully."))
 
 
-def menu_or_quit(id_):
+def menu_or_quit():
     """Ask the user if they want to go back to the menu or quit.
     Run a while loop until the user inputs a valid option.
-
-    Args:
-        id_ str: Employee ID that was used to log in.
-    Returns:
-        str: The user input - menu or quit.
     """
     while True:
         print(messages.to_menu())
@@ -559,7 +524,6 @@ def menu_or_quit(id_):
         if validate_choice_letter(answer, ["MENU", "QUIT"]):
             if answer == "MENU":
                 utility.clear()
-                employee_main(id_)
-                break
+                return
             title.display_goodbye()
             sys.exit()
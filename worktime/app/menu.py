@@ -1,11 +1,57 @@
 """Menu Module
 
-This module provides functions that display numbered menu options in a box.
+This module provides functions that display numbered menu options in a box
+and the loop that navigates between a portal's menu and its options.
 """
 
+# Built-in Modules
+import sys
+
 # Custom Package
-from worktime.app import utility
+from worktime.app import messages, title, utility
 from worktime.app.utility import print_in_colour as colour
+from worktime.app.validations import validate_choice_number
+from worktime.worksheets import journal
+
+
+class BackToMenu(Exception):
+    """Raised by a prompt when the user enters MENU, so the option in
+    progress is abandoned and run_portal displays the menu again.
+    """
+
+
+def run_portal(display_menu, options, *args):
+    """Display a portal menu and run the chosen option, in a loop.
+    Options return to this loop when they finish, or raise BackToMenu
+    from a nested prompt, instead of calling the portal again. So the
+    call stack stays the same depth however long the session lasts, and
+    finished screens are freed. The number after the last option exits.
+    If the storage backend cannot be reached, the option is abandoned
+    with a message and the menu is displayed again.
+
+    Args:
+        display_menu function: Displays the numbered menu.
+        options dict: Option number string to the function that runs it.
+        *args: Passed to the option functions, e.g. the employee ID.
+    """
+    numbers = range(1, len(options) + 2)
+    while True:
+        display_menu()
+        choice = input(colour("CYAN", ">>>\n")).strip()
+        utility.clear()
+        if not validate_choice_number(choice, numbers):
+            continue
+        if choice not in options:
+            title.display_goodbye()
+            sys.exit()
+        try:
+            options[choice](*args)
+        except BackToMenu:
+            utility.clear()
+        except Exception as error:
+            if not journal.is_unreachable(error):
+                raise
+            print(messages.unreachable())
 
 
 def employee_menu():
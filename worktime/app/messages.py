@@ -29,6 +29,13 @@ def to_menu():
     return message
 
 
+def unreachable():
+    """Return an error message for worksheets that cannot be reached."""
+    message = "The worksheets cannot be reached right now. "
+    message += "Please try again later.\n"
+    return colour("RED", message)
+
+
 def invalid_year():
     """Returns an error message for invalid year absence requests."""
     message = f"\n{colour('RED', 'Unable to process your request.')}\n"
@@ -0,0 +1,233 @@
+"""Entitlement Recalculation module
+
+This module keeps the entitlements worksheet in line with the
+absence_requests worksheet. A local state file remembers the last
+processed request ID, the requests whose status can still change
+(planned and pending) and each employee's totals. A run therefore only
+looks at new and open requests and rewrites the employees whose
+entitlement rows differ from their totals. Archived requests are counted
+from the yearly roll-ups when the totals are counted from scratch.
+"""
+
+# Built-in Modules
+import json
+import os
+
+# Third-party Packages
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to plain lists.
+    np = None
+
+# Custom Packages
+from worktime import config
+from worktime.app import utility
+from worktime.worksheets import archive, batch, entitlements, requests
+
+# Annual paid time off hours of every employee.
+TOTAL_HOURS = 200
+STATUSES = ["taken", "planned", "pending"]
+
+
+def classify_requests(all_req, today):
+    """Work out which entitlement bucket each request counts towards.
+    The columns are converted once - start dates to ordinals, flags to
+    booleans - and all rows are classified in one pass, using NumPy
+    arrays when NumPy is installed.
+
+    Args:
+        all_req list: A list of lists containing absence request data.
+        today date: The date to compare the start dates against.
+    Returns:
+        list: A (status, hours) tuple per request. Status is taken,
+              planned, pending or None if the request does not count.
+    """
+    today = today.toordinal()
+    # convert_date is cached, so each distinct date is parsed only once.
+    future = [utility.convert_date(req[2]).toordinal() > today
+              for req in all_req]
+    approved = [req[-2] == "True" for req in all_req]
+    rejected = [req[-2] == "False" for req in all_req]
+    active = [req[-1] == "False" for req in all_req]
+    hours = [int(float(req[-4]) * 8) for req in all_req]
+
+    if np is not None and all_req:
+        future, approved, rejected, active = (
+            np.array(column, dtype=bool)
+            for column in (future, approved, rejected, active))
+        codes = np.select(
+            [~future & approved & active,
+             future & approved & active,
+             future & ~rejected & active],
+            [1, 2, 3], default=0).tolist()
+    else:
+        codes = [0 if not is_active
+                 else (2 if is_approved else 0 if is_rejected else 3)
+                 if is_future
+                 else 1 if is_approved else 0
+                 for is_future, is_approved, is_rejected, is_active
+                 in zip(future, approved, rejected, active)]
+
+    return [(STATUSES[code - 1], req_hours) if code else (None, 0)
+            for code, req_hours in zip(codes, hours)]
+
+
+class EntitlementState:
+    """Represent what has been counted into the entitlements so far.
+
+    Args:
+        path str: The JSON file the state is kept in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        """Forget everything, so all requests are processed again."""
+        self.last_request_id = 0
+        # Request ID: [employee ID, status, hours] of planned/pending ones.
+        self.open = {}
+        # Employee ID: [taken, planned, pending] hours.
+        self.totals = {}
+
+    def load(self):
+        """Read the state file. Start from scratch if it is missing
+        or unreadable.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as state_file:
+                data = json.load(state_file)
+            self.last_request_id = data["last_request_id"]
+            self.open = data["open"]
+            self.totals = data["totals"]
+        except (OSError, ValueError, KeyError):
+            self.reset()
+
+    def save(self):
+        """Write the state file, replacing the old one in one step."""
+        data = {"last_request_id": self.last_request_id,
+                "open": self.open, "totals": self.totals}
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump(data, state_file)
+        os.replace(temp_path, self.path)
+
+    def count(self, req_id, ee_id, status, hours):
+        """Move a request's hours into its current bucket.
+
+        Args:
+            req_id str: The request ID.
+            ee_id str: The employee ID.
+            status str: Taken, planned, pending or None.
+            hours int: The request's hours.
+        """
+        self.uncount(req_id)
+        totals = self.totals.setdefault(ee_id, [0, 0, 0])
+        if status is not None:
+            totals[STATUSES.index(status)] += hours
+        if status in ("planned", "pending"):
+            self.open[req_id] = [ee_id, status, hours]
+
+    def uncount(self, req_id):
+        """Take an open request's hours out of its employee's totals.
+
+        Args:
+            req_id str: The request ID.
+        """
+        if req_id in self.open:
+            ee_id, status, hours = self.open.pop(req_id)
+            self.totals[ee_id][STATUSES.index(status)] -= hours
+
+    def process(self, request_sheet, today):
+        """Count the new requests and re-check the open ones.
+        Taken, rejected and cancelled requests cannot change any more.
+
+        Args:
+            request_sheet Requests: The absence_requests worksheet.
+            today date: The date to classify the requests against.
+        """
+        if not self.matches(request_sheet):
+            # Nothing counted yet, or the worksheet no longer matches the
+            # state: start again.
+            self.reset()
+            self.count_archived()
+
+        changed = [request_sheet.get_request(req_id) for req_id in self.open]
+        new_req = self.get_new(request_sheet.requests)
+        changed.extend(new_req)
+
+        statuses = classify_requests(changed, today)
+        for request, (status, hours) in zip(changed, statuses):
+            self.count(request[0], request[1], status, hours)
+        if new_req:
+            self.last_request_id = int(new_req[-1][0])
+
+    def get_new(self, all_req):
+        """Return list: the requests after the last processed one, in ID
+        order.
+
+        Args:
+            all_req list: The absence_requests rows' values.
+        """
+        new_req = []
+        for request in reversed(all_req):
+            if int(request[0]) <= self.last_request_id:
+                break
+            new_req.append(request)
+        return new_req[::-1]
+
+    def matches(self, request_sheet):
+        """Check if the state can be brought up to date: something has
+        been counted, and neither the last processed request nor a
+        request still to be re-checked has been archived.
+
+        Args:
+            request_sheet Requests: The absence_requests worksheet.
+        """
+        if (not self.last_request_id or
+                request_sheet.get_request(str(self.last_request_id)) is None):
+            return False
+        return all(request_sheet.get_request(req_id) is not None
+                   for req_id in self.open)
+
+    def count_archived(self):
+        """Add the absence hours of the archived years' roll-ups to the
+        taken totals. Archived requests are all in the past.
+        """
+        for _, ee_id, *_, hours in archive.get_rollups():
+            self.totals.setdefault(ee_id, [0, 0, 0])[0] += int(hours)
+
+    def get_rows(self):
+        """Return dict: employee ID to the entitlement row values."""
+        rows = {}
+        for ee_id, (taken, planned, pending) in self.totals.items():
+            unallocated = TOTAL_HOURS - (taken + planned + pending)
+            rows[ee_id] = [ee_id, TOTAL_HOURS, taken,
+                           planned, pending, unallocated]
+        return rows
+
+
+def update_entitlements():
+    """Bring the entitlements worksheet up to date with the requests.
+    Only the cells whose values have changed are written, all in one
+    batch, as the differences to the values they were compared with.
+    Being increments, they keep a change another terminal has just made.
+    """
+    today = utility.GetDatetime().tday()
+    state = EntitlementState(config.STATE_PATH)
+    state.load()
+    state.process(requests.Requests(), today)
+
+    ent_sheet = entitlements.Entitlements()
+    with batch.Batch():
+        for ee_id, values in state.get_rows().items():
+            found = ent_sheet.worksheet.find((0,), (ee_id,))
+            if not found:
+                continue
+            deltas = {chr(65 + col): value - int(float(found[1][col]))
+                      for col, value in enumerate(values[1:], start=1)
+                      if str(value) != found[1][col]}
+            if deltas:
+                ent_sheet.worksheet.increment(found[0], deltas)
+    state.save()
@@ -0,0 +1,168 @@
+"""Session Module
+
+This module keeps the logged-in employee's data in memory for the length
+of their session: profile, entitlements, open absence requests and their
+clockings. The data is loaded once at login and every write made through
+the session updates the in-memory copy too, so menu options render from
+memory instead of reading the worksheets again. Clockings are loaded for
+the current week at login and for other weeks when they are viewed.
+"""
+
+# Custom Packages
+from worktime.app import utility
+from worktime.worksheets import (cache, clocklog, clockings, employees,
+                                 entitlements, requests)
+
+
+class Session:
+    """Represent a logged-in employee.
+
+    Args:
+        id_ str: Employee ID that was used to log in.
+    """
+
+    def __init__(self, id_):
+        self.id_ = id_
+        self.clock_sheet = clockings.Clockings(id_)
+        self.entitle_sheet = entitlements.Entitlements(id_)
+        self.request_sheet = requests.Requests(id_)
+        _, (_, fname, lname) = (employees.Employees(id_).worksheet
+                                .find((0,), (id_,)))
+        self.profile = {"id": id_, "first_name": fname, "last_name": lname}
+        # Total, taken, planned, pending and unallocated hours.
+        self.entitlements = self.entitle_sheet.get_entitlements()
+        self.open_requests = self.request_sheet.get_cancellable_absence()
+        # Date: (ID, date, clock in, clock out) of the employee's clockings
+        # on the loaded dates.
+        self.clockings = {}
+        self.loaded_dates = set()
+        self.load_clockings(
+            utility.get_week(utility.GetDatetime().tday(), "week"))
+
+    def load_clockings(self, dates):
+        """Read the employee's clockings on the dates not loaded yet, with
+        the times still waiting in the clock event log laid over them.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+        """
+        dates = [date_ for date_ in dates if date_ not in self.loaded_dates]
+        if not dates:
+            return
+        for _, clocking in self.clock_sheet.get_rows(
+                dates, archived=True, stale=True):
+            if clocking[0] == self.id_:
+                self.clockings.setdefault(clocking[1], clocking)
+        log = clocklog.get_log()
+        for date_ in dates:
+            pending = log.pending(self.id_, date_)
+            if pending:
+                _, _, clock_in, clock_out = self.clockings.get(
+                    date_, (self.id_, date_, "", ""))
+                self.clockings[date_] = (self.id_, date_,
+                                         pending.get("in", clock_in),
+                                         pending.get("out", clock_out))
+        self.loaded_dates.update(dates)
+
+    def get_clocking(self, date_):
+        """Look up the employee's clocking for a date.
+
+        Args:
+            date_ str: A DD/MM/YYYY format date.
+        Returns:
+            dict: Clocking data, None if there is none for the date.
+        """
+        self.load_clockings([date_])
+        clocking = self.clockings.get(date_)
+        if clocking:
+            ee_id, date, clock_in, clock_out = clocking
+            return ({"id": ee_id, "date": date,
+                     "start_time": clock_in, "end_time": clock_out})
+
+    def add_clocking(self, data):
+        """Add clocking data to the worksheet and the session.
+
+        Args:
+            data list: Contains Employee ID, Date, Clock in, Clock out
+        """
+        self.clock_sheet.add_clocking(data)
+        clocking = [str(value) for value in data]
+        clocking.extend([""] * (4 - len(clocking)))
+        self.clockings[clocking[1]] = tuple(clocking)
+
+    def update_clock_in(self, date_, time_):
+        """Replace an existing clock in time with a new one.
+
+        Args:
+            date_ str: A DD/MM/YYYY format date.
+            time_ str: A HH:MM:SS format time.
+        """
+        self.clock_sheet.update_clock_in(date_, time_)
+        ee_id, _, _, clock_out = self.clockings[date_]
+        self.clockings[date_] = (ee_id, date_, time_, clock_out)
+
+    def update_clock_out(self, date_, time_):
+        """Replace an existing clock out time with a new one.
+
+        Args:
+            date_ str: A DD/MM/YYYY format date.
+            time_ str: A HH:MM:SS format time.
+        """
+        self.clock_sheet.update_clock_out(date_, time_)
+        ee_id, _, clock_in, _ = self.clockings[date_]
+        self.clockings[date_] = (ee_id, date_, clock_in, time_)
+
+    def move_hours(self, hours, from_bucket, to_bucket):
+        """Transfer hours between entitlement buckets in the worksheet and
+        take the row as stored, other terminals' changes included. Inside
+        a batch.Batch block the cached row with the hours moved is taken.
+
+        Args:
+            hours int: The requested absence hours.
+            from_bucket str: Taken, planned, pending or unallocated.
+            to_bucket str: Taken, planned, pending or unallocated.
+        """
+        self.entitlements = self.entitle_sheet.move(hours, from_bucket,
+                                                    to_bucket)
+
+    def add_request(self, data):
+        """Add a new absence request to the worksheet and the session.
+
+        Args:
+            data list: A list containing request details as
+            requests.Requests.add_request takes them.
+        Returns:
+            str: The allocated request ID.
+        """
+        req_id = self.request_sheet.add_request(data)
+        self.open_requests.append((req_id, *map(str, data[1:])))
+        return req_id
+
+    def load_requests(self):
+        """Read the employee's open absence requests again, from a fresh
+        copy of the worksheet, e.g. after an admin has decided on some.
+        """
+        cache.CACHE.expire("absence_requests")
+        self.open_requests = self.request_sheet.get_cancellable_absence()
+
+    def get_request(self, req_id):
+        """Read an absence request from a fresh copy of the worksheet.
+
+        Args:
+            req_id str: The request ID.
+        Returns:
+            tuple: The request's row values, None if the ID is unknown.
+        """
+        cache.CACHE.expire("absence_requests")
+        return self.request_sheet.get_request(req_id)
+
+    def cancel_request(self, req_id):
+        """Mark an open absence request as cancelled and drop it from
+        the session.
+
+        Args:
+            req_id str: The request ID.
+        """
+        self.request_sheet.update_cancelled(req_id)
+        self.open_requests = [request for request in self.open_requests
+                              if request[0] != req_id]
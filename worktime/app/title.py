@@ -6,7 +6,6 @@ admin portal and exit screen.
 
 # Custom Packages
 from worktime.app import utility
-from worktime.worksheets.employees import Employees
 
 PORTAL = """
                 ██████   ██████  ██████  ████████  █████  ██
@@ -32,14 +31,13 @@ def display_main_title():
     print("\n" + "=" * 80)
 
 
-def display_employee_title(id_):
+def display_employee_title(fname):
     """Display the title and welcome message for the employee portal.
 
     Args:
-        id_ str: Employee ID that was used to log in.
+        fname str: The logged-in employee's first name.
     """
     utility.clear()
-    fname = Employees(id_).get_fname()
     print("""
       ███████ ███    ███ ██████  ██       ██████  ██    ██ ███████ ███████
       ██      ████  ████ ██   ██ ██      ██    ██  ██  ██  ██      ██
@@ -1,12 +1,16 @@
 """Utility module
 
 This module provides functions for clearing the console, changing
-text colour, getting and converting a date and time and displaying a table.
+text colour, getting and converting a date and time, counting working
+days and displaying a table.
 """
 
 # Built-in Modules
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime, time, timedelta
 from enum import Enum
+from functools import lru_cache
+from itertools import accumulate
 from os import name, system
 
 # Third-party Packages
@@ -14,6 +18,9 @@ from colorama import init, Back, Fore, Style
 import pytz
 from tabulate import tabulate
 
+# Custom Package
+from worktime import config
+
 # colorama method to enable it on Windows
 init()
 
@@ -43,13 +50,71 @@ def print_in_colour(colour, text):
     return Colours[colour].value + text + Colours.RESET.value
 
 
+DUBLIN = pytz.timezone("Europe/Dublin")
+
+
+class Clock:
+    """Represent the source of the current time in Dublin."""
+
+    def __init__(self, tz=DUBLIN):
+        self.tz = tz
+
+    def now(self):
+        """Return datetime: the current time-zone aware date and time."""
+        return datetime.now(self.tz)
+
+
+class FakeClock(Clock):
+    """Represent a clock that stands still until it is moved on, for
+    deterministic tests and benchmarks.
+
+    Args:
+        start datetime: The time to start from, Dublin time if naive.
+    """
+
+    def __init__(self, start, tz=DUBLIN):
+        super().__init__(tz)
+        self.current = tz.localize(start) if start.tzinfo is None else start
+
+    def now(self):
+        """Return datetime: the fake current time."""
+        return self.current
+
+    def advance(self, **kwargs):
+        """Move the clock on, e.g. advance(hours=1).
+
+        Args:
+            kwargs: timedelta() arguments.
+        """
+        self.current = self.tz.normalize(self.current + timedelta(**kwargs))
+
+
+_clock = Clock()
+
+
+def get_clock():
+    """Return Clock: the clock the application reads the time from."""
+    return _clock
+
+
+def set_clock(clock):
+    """Replace the application clock, e.g. with a FakeClock.
+
+    Args:
+        clock Clock: The new clock.
+    """
+    global _clock
+    _clock = clock
+
+
 class GetDatetime:
-    """Represent the current datetime of Dublin."""
+    """Represent the current datetime of Dublin. Each instance is a
+    snapshot, so one operation can read the date and time consistently.
+    """
 
     def __init__(self):
-        """Set a time zone to Dublin."""
-        self.dublin = pytz.timezone("Europe/Dublin")
-        self.now = datetime.now(self.dublin)
+        """Read the current time from the application clock."""
+        self.now = get_clock().now()
 
     def now_year(self):
         """Return int: the current year."""
@@ -72,9 +137,15 @@ class GetDatetime:
         return self.now.time().strftime("%H:%M:%S")
 
 
+# Maximum number of distinct strings each parsing cache remembers.
+PARSE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def convert_date(date_):
     """Split a string into a list of integers that represent
     year, month and date, and then pass them to date() object.
+    Results are cached, as the same dates are parsed over and over.
 
     Args:
         date_ str: A date - DD/MM/YYYY.
@@ -87,9 +158,11 @@ def convert_date(date_):
     return converted_date
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def convert_time(time_):
     """Split a string into a list of integers that represent
     hours, minutes and seconds if any, and then pass them to time() object.
+    Results are cached.
 
     Args:
         time_ str: A time - %H:%M or %H:%M:%S
@@ -102,6 +175,60 @@ def convert_time(time_):
     return converted_time
 
 
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date_input(date_):
+    """Strictly parse a DD/MM/YYYY date typed by a user. Results are cached;
+    invalid input is not.
+
+    Args:
+        date_ str: User input value.
+    Returns:
+        date: An instance of datetime.date().
+    Raises:
+        ValueError: If the date is invalid or not in DD/MM/YYYY format.
+    """
+    return datetime.strptime(date_, "%d/%m/%Y").date()
+
+
+def get_parse_cache_stats():
+    """Return dict: hits, misses and size of each parsing cache."""
+    return {"date": convert_date.cache_info(),
+            "time": convert_time.cache_info(),
+            "date_input": parse_date_input.cache_info()}
+
+
+def to_ordinal(date_):
+    """Convert a DD/MM/YYYY string into a day number for comparisons.
+
+    Args:
+        date_ str: A date - DD/MM/YYYY.
+    Returns:
+        int: The proleptic Gregorian ordinal, None if date_ is not a date.
+    """
+    try:
+        return convert_date(date_).toordinal()
+    except (ValueError, IndexError):
+        return None
+
+
+def to_seconds(time_):
+    """Convert a HH:MM or HH:MM:SS string into seconds since midnight.
+
+    Args:
+        time_ str: A time - HH:MM or HH:MM:SS.
+    Returns:
+        int: The number of seconds, None if time_ is not a time.
+    """
+    try:
+        parts = list(map(int, time_.split(":")))
+    except ValueError:
+        return None
+    if len(parts) not in (2, 3):
+        return None
+    parts.extend([0] * (3 - len(parts)))
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
 def get_week(date_, result):
     """Return a list of a week(inc./excl. weekend) of the given date.
 
@@ -126,7 +253,8 @@ def get_week(date_, result):
 
 
 def get_num_of_weekdays(date1, date2):
-    """Calculate total number of weekdays between two dates.
+    """Calculate total number of working days between two dates.
+    Weekends, and public holidays if config.HOLIDAYS is set, are excluded.
 
     Args:
         date1 str: Start date - DD/MM/YYYY.
@@ -134,13 +262,140 @@ def get_num_of_weekdays(date1, date2):
     Returns:
         int: Total number of weekdays.
     """
-    # Source: Dave Webb's answer on Stack Overflow
-    # https://stackoverflow.com/questions/3615375
     date1 = convert_date(date1)
     date2 = convert_date(date2)
-    days = (date1 + timedelta(n) for n in range((date2 - date1).days + 1))
-    total_weekdays = sum(1 for day in days if day.weekday() < 5)
-    return total_weekdays
+    return get_calendar().working_days(date1, date2)
+
+
+def count_weekdays(date1, date2):
+    """Count Monday to Friday dates from date1 to date2 inclusive
+    without visiting each day.
+
+    Args:
+        date1 date: Start date.
+        date2 date: End date.
+    Returns:
+        int: Total number of weekdays, 0 if date2 is before date1.
+    """
+    total_days = (date2 - date1).days + 1
+    if total_days <= 0:
+        return 0
+    weeks, extra_days = divmod(total_days, 7)
+    first_weekday = date1.weekday()
+    extra_weekdays = sum(1 for day in range(extra_days)
+                         if (first_weekday + day) % 7 < 5)
+    return weeks * 5 + extra_weekdays
+
+
+def get_easter_sunday(year):
+    """Return date: Easter Sunday of the year (Gregorian calendar)."""
+    # Source: Anonymous Gregorian algorithm (Meeus/Jones/Butcher)
+    # https://en.wikipedia.org/wiki/Date_of_Easter
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    dow = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * dow) // 451
+    month, day = divmod(h + dow - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def get_irish_bank_holidays(year):
+    """Return the Irish public holidays of the year. A fixed-date holiday
+    that falls on a weekend moves to the next free weekday.
+
+    Args:
+        year int: The year.
+    Returns:
+        list: Sorted dates.
+    """
+    def first_monday(month):
+        first = date(year, month, 1)
+        return first + timedelta(days=(7 - first.weekday()) % 7)
+
+    last_october = date(year, 10, 31)
+    holidays = {
+        get_easter_sunday(year) + timedelta(days=1),
+        first_monday(5),
+        first_monday(6),
+        first_monday(8),
+        last_october - timedelta(days=last_october.weekday()),
+    }
+    if year >= 2023:
+        # St Brigid's Day: 1 February if a Friday, else the first Monday.
+        brigid = date(year, 2, 1)
+        holidays.add(brigid if brigid.weekday() == 4 else first_monday(2))
+    fixed = [date(year, month, day)
+             for month, day in [(1, 1), (3, 17), (12, 25), (12, 26)]]
+    holidays.update(day for day in fixed if day.weekday() < 5)
+    for holiday in fixed:
+        if holiday.weekday() > 4:
+            holiday += timedelta(days=7 - holiday.weekday())
+            while holiday in holidays:
+                holiday += timedelta(days=1)
+            holidays.add(holiday)
+    return sorted(holidays)
+
+
+class WorkingDayCalendar:
+    """Represent working days (weekdays that are not public holidays)
+    from the start of first_year to the end of last_year. Prefix sums over
+    the days answer "working days between A and B" in constant time.
+
+    Args:
+        first_year int: The first year covered by the prefix sums.
+        last_year int: The last year covered by the prefix sums.
+        holidays list: Public holiday dates.
+    """
+
+    def __init__(self, first_year, last_year, holidays=()):
+        self.start = date(first_year, 1, 1).toordinal()
+        self.end = date(last_year, 12, 31).toordinal()
+        self.holidays = sorted(day.toordinal() for day in holidays
+                               if day.weekday() < 5)
+        holiday_set = set(self.holidays)
+        # prefix[n] is the number of working days in the first n days.
+        self.prefix = [0] + list(accumulate(
+            date.fromordinal(day).weekday() < 5 and day not in holiday_set
+            for day in range(self.start, self.end + 1)))
+
+    def working_days(self, date1, date2):
+        """Count working days from date1 to date2 inclusive.
+
+        Args:
+            date1 date: Start date.
+            date2 date: End date.
+        Returns:
+            int: Total number of working days, 0 if date2 is before date1.
+        """
+        first, last = date1.toordinal(), date2.toordinal()
+        if last < first:
+            return 0
+        if self.start <= first and last <= self.end:
+            return (self.prefix[last - self.start + 1] -
+                    self.prefix[first - self.start])
+        # Outside the precomputed years: count weekdays, less holidays.
+        num_of_holidays = (bisect_right(self.holidays, last) -
+                           bisect_left(self.holidays, first))
+        return count_weekdays(date1, date2) - num_of_holidays
+
+
+@lru_cache(maxsize=None)
+def get_calendar():
+    """Return WorkingDayCalendar: last year to next year, with the public
+    holidays set in config.HOLIDAYS, built once per process.
+    """
+    this_year = GetDatetime().now_year()
+    years = range(this_year - 1, this_year + 2)
+    holidays = []
+    if config.HOLIDAYS == "IE":
+        for year in years:
+            holidays.extend(get_irish_bank_holidays(year))
+    return WorkingDayCalendar(years[0], years[-1], holidays)
 
 
 def display_table(table, headers=None):
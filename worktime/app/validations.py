@@ -5,45 +5,62 @@ This module provides functions that validate a user input.
 
 # Built-in Modules
 from datetime import datetime
+from functools import lru_cache
 
 # Third-party Packages
-from passlib.hash import pbkdf2_sha256
+from passlib.context import CryptContext
 
 # Custom Packages
+from worktime import config
 from worktime.app import utility
 from worktime.app.utility import print_in_colour as colour
 
+PASSWORDS = CryptContext(schemes=["pbkdf2_sha256"],
+                         pbkdf2_sha256__rounds=config.PBKDF2_ROUNDS)
 
-def validate_login(id_, pw_, all_ids, correct_pw):
-    """In the try block, compare the given ID and password
-    to the list of IDs and matching password.
+
+@lru_cache(maxsize=None)
+def get_dummy_hash():
+    """Return str: a hash at the target cost for unknown IDs to check."""
+    return PASSWORDS.hash("")
+
+
+def validate_login(pw_, correct_pw):
+    """Compare the given password to the stored hash. An unknown ID is
+    checked against a dummy hash, so it takes as long to reject as a
+    wrong password and does not reveal which IDs exist.
 
     Args:
-        id_ str: User input value for employee ID.
         pw_ str: User input value for password.
-        all_ids: All employees' IDs.
-        correct_pw: The matching password.
+        correct_pw str: The ID's password hash, None if the ID is unknown.
     Returns:
-        bool: True if the ID in the list, False otherwise.
-    Raises:
-        ValueError: If the ID is not in the ID list
-                    or the password does not match.
-        TypeError: If the input value is None.
+        bool: True if the password matches, False otherwise.
     """
-    try:
-        valid_pw = pbkdf2_sha256.verify(pw_, correct_pw)
-        if id_ not in all_ids:
-            raise ValueError()
-        if not valid_pw:
-            raise ValueError()
-    except ValueError:
-        print(colour("RED", "Invalid employee ID or password."))
-        return False
-    except TypeError:
-        print(colour("RED", "Invalid employee ID or password."))
-        return False
+    if correct_pw is None:
+        PASSWORDS.verify(pw_, get_dummy_hash())
+        valid_pw = False
     else:
-        return True
+        try:
+            valid_pw = PASSWORDS.verify(pw_, correct_pw)
+        except ValueError:
+            valid_pw = False
+    if not valid_pw:
+        print(colour("RED", "Invalid employee ID or password."))
+    return valid_pw
+
+
+def rehash_password(pw_, correct_pw):
+    """Hash a verified password again if its stored hash does not use
+    the configured number of rounds.
+
+    Args:
+        pw_ str: The verified password.
+        correct_pw str: The stored password hash.
+    Returns:
+        str: The new hash, None if the stored one is up to date.
+    """
+    if PASSWORDS.needs_update(correct_pw):
+        return PASSWORDS.hash(pw_)
 
 
 def validate_id(id_, ids):
@@ -123,8 +140,7 @@ def validate_date(date_):
                     the year, month and date.
     """
     try:
-        date_format = "%d/%m/%Y"
-        new_date = datetime.strptime(date_, date_format).date()
+        new_date = utility.parse_date_input(date_)
     except ValueError:
         print(colour("RED", "Invalid value: " + date_))
         return False
@@ -0,0 +1,55 @@
+"""Configuration Module
+
+This module reads the application settings from environment variables
+and falls back to the defaults below.
+"""
+
+# Built-in Modules
+import os
+
+# Storage backend the worksheets package talks to: gsheets or sqlite.
+BACKEND = os.environ.get("WORKTIME_BACKEND", "gsheets").lower()
+
+# Google Sheets settings
+CREDS_FILE = os.environ.get("WORKTIME_CREDS_FILE", "creds.json")
+SPREADSHEET_NAME = os.environ.get("WORKTIME_SPREADSHEET", "work_time")
+
+# Sheets API requests allowed per minute, and times a request refused
+# with a quota (429) or server (5xx) error is retried.
+SHEETS_QUOTA = int(os.environ.get("WORKTIME_SHEETS_QUOTA", "60"))
+SHEETS_MAX_RETRIES = int(os.environ.get("WORKTIME_SHEETS_MAX_RETRIES", "5"))
+
+# SQLite settings
+SQLITE_PATH = os.environ.get("WORKTIME_SQLITE_PATH", "work_time.db")
+
+# Seconds a downloaded worksheet is reused before it is read again.
+# 0 turns the snapshot cache off.
+CACHE_TTL = float(os.environ.get("WORKTIME_CACHE_TTL", "60"))
+
+# File that remembers which absence requests have been counted into
+# the entitlements worksheet, so start-up only processes the changes.
+STATE_PATH = os.environ.get("WORKTIME_STATE_PATH", ".worktime_state.json")
+
+# File that keeps the map of dates to clockings rows between runs, so a
+# new process only reads the rows added since instead of the date column.
+DATES_PATH = os.environ.get("WORKTIME_DATES_PATH", ".worktime_dates.json")
+
+# Local append-only log of clock in/out events not yet written to the
+# clockings worksheet, and the seconds between folding them into it.
+# Each process logs to this path plus its process ID.
+CLOCK_LOG_PATH = os.environ.get("WORKTIME_CLOCK_LOG", ".worktime_clock.log")
+CLOCK_COMPACT_INTERVAL = float(
+    os.environ.get("WORKTIME_CLOCK_COMPACT_INTERVAL", "30"))
+
+# Local write-ahead journal of worksheet writes not yet applied to the
+# storage backend, e.g. while Google Sheets cannot be reached.
+# Each process journals to this path plus its process ID.
+JOURNAL_PATH = os.environ.get("WORKTIME_JOURNAL", ".worktime_journal.log")
+
+# Public holidays left out of working day counts: "" for none or
+# "IE" for Irish bank holidays.
+HOLIDAYS = os.environ.get("WORKTIME_HOLIDAYS", "").upper()
+
+# PBKDF2-SHA256 rounds for password hashes. Stored hashes with a different
+# cost are rehashed when their owner next logs in.
+PBKDF2_ROUNDS = int(os.environ.get("WORKTIME_PBKDF2_ROUNDS", "29000"))
@@ -1,12 +1,20 @@
 """Work Time worksheets package.
-This package contains 6 modules that CRUD data from/to
-the Google Sheets workbook.
+This package contains 14 modules that CRUD data from/to
+the Google Sheets workbook or a local SQLite file.
 
 Modules:
+    archive: Move closed periods into yearly partitions with roll-ups.
     auth: Enable Google API access for the project.
+    backends: Storage engines - Google Sheets and SQLite.
+    batch: Collect worksheet writes and send them in one request.
+    cache: Share worksheet snapshots across the process.
+    clocklog: Log clock events locally and fold them into clockings.
     clockings: Retrieve and update clock in/out times.
     credentials: Retrieve employee IDs and the matching password.
     employees: Retrieve all employees' IDs and names.
     entitlements: Retrieve and update employee's absence entitlements.
+    journal: Commit writes locally and replay them to the backend.
+    logfiles: Keep a locked local log file per process.
     requests: Retrieve and update absence requests.
+    scheduler: Pace and retry Google Sheets API requests.
 """
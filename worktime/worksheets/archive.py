@@ -0,0 +1,204 @@
+"""Archive Module
+
+This module moves closed periods out of the worksheets that only grow.
+Clockings of past payroll months and absence requests of past absence
+years are appended to yearly partitions, e.g. clockings_2025, which are
+worksheets of the same workbook, so every terminal shares the history.
+A roll-up row per year and employee keeps the year's totals, and the
+moved rows are then deleted from the live worksheets, so those only hold
+open periods. Updates to their rows carry the row's key (see
+backends.KEY_COLS) and land on the row that holds it when they are made,
+also those written by running terminals or waiting in their journals.
+"""
+
+# Custom Packages
+from worktime.worksheets import backends, batch, cache, clockings, requests
+from worktime.app import utility
+
+# Partitioned worksheet: its date column, which picks the partition.
+DATE_COLS = {"clockings": 1, "absence_requests": 2}
+ROLLUPS = "yearly_rollups"
+
+
+def get_cutoffs(today):
+    """Return dict: partitioned worksheet to the first date kept live -
+    the first day of the current payroll month for clockings and of the
+    current absence year for absence requests.
+
+    Args:
+        today date: The date the periods are closed on.
+    """
+    return {"clockings": today.replace(day=1),
+            "absence_requests": today.replace(month=1, day=1)}
+
+
+def is_closed(name, values, cutoff):
+    """Check if a row belongs to a closed period. A request awaiting a
+    decision stays live, as it can still change.
+
+    Args:
+        name str: The partitioned worksheet.
+        values tuple: The row's values.
+        cutoff int: The ordinal of the first date kept live.
+    Returns:
+        bool: True if the row can be archived.
+    """
+    ordinal = utility.to_ordinal(values[DATE_COLS[name]])
+    if ordinal is None or ordinal >= cutoff:
+        return False
+    return (name != "absence_requests" or
+            tuple(values[col] for col in requests.STATUS_COLS[:2])
+            != requests.PENDING)
+
+
+def add_to_partition(backend, name, year, rows):
+    """Append rows to a yearly partition, creating it if missing. Rows
+    already in it are skipped, so an interrupted archive can be re-run.
+
+    Args:
+        backend Backend: The active backend.
+        name str: The partitioned worksheet.
+        year int: The year of the rows.
+        rows list: The rows' values.
+    """
+    title = backends.partition_name(name, year)
+    if not backend.has_worksheet(title):
+        backend.add_worksheet(title)
+    archived = {backends.get_key(name, values) for values
+                in cache.worksheet(title).get_all_values()[1:]}
+    rows = [list(values) for values in rows
+            if backends.get_key(name, values) not in archived]
+    if rows:
+        backend.worksheet(title).append_rows(rows)
+        cache.CACHE.invalidate(title)
+        clockings.get_ranges(title).reset()
+
+
+def get_partition(name, year):
+    """Read a yearly partition.
+
+    Args:
+        name str: The partitioned worksheet.
+        year int: The year.
+    Returns:
+        list: The rows' values, header row left out. Empty if missing.
+    """
+    title = backends.partition_name(name, year)
+    if not backends.get_backend().has_worksheet(title):
+        return []
+    return cache.worksheet(title).get_all_values()[1:]
+
+
+def update_rollups(year):
+    """Recompute a year's roll-ups from its partitions: per employee, the
+    days clocked and hours between clock in and out, and the days and
+    hours of approved absence that was not cancelled.
+
+    Args:
+        year int: The year.
+    """
+    totals = {}
+    for ee_id, _, clock_in, clock_out in get_partition("clockings", year):
+        total = totals.setdefault(ee_id, [0, 0, 0, 0])
+        start = utility.to_seconds(clock_in)
+        end = utility.to_seconds(clock_out)
+        if start is not None:
+            total[0] += 1
+        if start is not None and end is not None and end > start:
+            total[1] += end - start
+    for request in get_partition("absence_requests", year):
+        total = totals.setdefault(request[1], [0, 0, 0, 0])
+        if request[8] == "True" and request[9] == "False":
+            total[2] += float(request[6])
+            total[3] += int(float(request[6]) * 8)
+
+    backend = backends.get_backend()
+    if not backend.has_worksheet(ROLLUPS):
+        backend.add_worksheet(ROLLUPS)
+    worksheet = cache.worksheet(ROLLUPS)
+    with batch.Batch():
+        for ee_id, (days, seconds, absence_days, absence_hours) in sorted(
+                totals.items()):
+            values = [str(year), ee_id, str(days),
+                      f"{seconds / 3600:.2f}", f"{absence_days:g}",
+                      str(absence_hours)]
+            found = worksheet.find((0, 1), (str(year), ee_id))
+            if found is None:
+                worksheet.append_row(values)
+            elif list(found[1]) != values:
+                worksheet.update(f"A{found[0]}:F{found[0]}", [values])
+
+
+def archive(today):
+    """Move the rows of closed periods into their yearly partitions,
+    update those years' roll-ups and delete the rows from the live
+    worksheets, in that order, so a failure never loses a row.
+
+    Args:
+        today date: The date the periods are closed on.
+    Returns:
+        dict: Partitioned worksheet to the number of rows moved.
+    """
+    backend = backends.get_backend()
+    closed = {}
+    years = set()
+    for name, cutoff in get_cutoffs(today).items():
+        values = backend.worksheet(name).get_all_values()[1:]
+        closed[name] = [(row, cells) for row, cells
+                        in enumerate(values, start=2)
+                        if is_closed(name, cells, cutoff.toordinal())]
+        by_year = {}
+        for _, cells in closed[name]:
+            year = utility.convert_date(cells[DATE_COLS[name]]).year
+            by_year.setdefault(year, []).append(cells)
+        for year, rows in sorted(by_year.items()):
+            add_to_partition(backend, name, year, rows)
+        years.update(by_year)
+
+    for year in sorted(years):
+        update_rollups(year)
+
+    for name, rows in closed.items():
+        backend.delete_rows(name, [row for row, _ in rows])
+        cache.CACHE.invalidate(name)
+    clockings.get_ranges("clockings").reset()
+    return {name: len(rows) for name, rows in closed.items()}
+
+
+def get_rows(name):
+    """Read a partitioned worksheet's whole history.
+
+    Args:
+        name str: The partitioned worksheet.
+    Returns:
+        list: The rows' values, header rows left out - the partitions'
+              rows, oldest year first, followed by the live rows.
+    """
+    rows = []
+    for year in get_years():
+        rows.extend(get_partition(name, year))
+    rows.extend(cache.worksheet(name).get_all_values()[1:])
+    return rows
+
+
+def get_rollups(year=None):
+    """Read the yearly roll-ups.
+
+    Args:
+        year int: The year to read. All years if None.
+    Returns:
+        list: Tuples of year, employee ID, clocked days, clocked hours,
+              absence days and absence hours. Empty if nothing has been
+              archived.
+    """
+    if not backends.get_backend().has_worksheet(ROLLUPS):
+        return []
+    rows = cache.worksheet(ROLLUPS).get_all_values()[1:]
+    if year is not None:
+        rows = [values for values in rows if values[0] == str(year)]
+    return rows
+
+
+def get_years():
+    """Return list: the archived years, oldest first."""
+    return sorted({int(values[0]) for values in get_rollups()})
@@ -1,11 +1,21 @@
 """API Module
 
 This module allows using Google APIs.
+The client is authorised on first use, not on import, and is shared by
+the whole process together with the spreadsheet and worksheet handles.
 """
 
+# Built-in Modules
+from functools import lru_cache
+
 # Third-party Packages
-import gspread
+from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+
+# Custom Package
+from worktime import config
+from worktime.worksheets import scheduler
 
 SCOPE = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -13,7 +23,47 @@ SCOPE = [
     "https://www.googleapis.com/auth/drive"
 ]
 
-CREDS = Credentials.from_service_account_file("creds.json")
-SCOPED_CREDS = CREDS.with_scopes(SCOPE)
-GSPREAD_CLIENT = gspread.authorize(SCOPED_CREDS)
-SHEET = GSPREAD_CLIENT.open("work_time")
+# Number of kept-alive HTTPS connections to the Google APIs.
+POOL_SIZE = 4
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    """Authorise the service account and return a gspread client.
+    The client's session keeps its connections open between requests,
+    and every request is paced and retried by the scheduler.
+
+    Returns:
+        gspread.Client: The process-wide client.
+    """
+    creds = Credentials.from_service_account_file(config.CREDS_FILE)
+    scoped_creds = creds.with_scopes(SCOPE)
+    session = AuthorizedSession(scoped_creds)
+    session.mount("https://", HTTPAdapter(pool_connections=POOL_SIZE,
+                                          pool_maxsize=POOL_SIZE))
+    return scheduler.ScheduledClient(auth=scoped_creds, session=session)
+
+
+@lru_cache(maxsize=None)
+def get_spreadsheet():
+    """Return gspread.Spreadsheet: the work_time workbook, opened once."""
+    return get_client().open(config.SPREADSHEET_NAME)
+
+
+@lru_cache(maxsize=None)
+def get_worksheet(name):
+    """Return a worksheet handle, looked up once per title.
+
+    Args:
+        name str: The worksheet title.
+    Returns:
+        gspread.Worksheet: The worksheet.
+    """
+    return get_spreadsheet().worksheet(name)
+
+
+def __getattr__(name):
+    """Keep auth.SHEET working without opening the workbook on import."""
+    if name == "SHEET":
+        return get_spreadsheet()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,932 @@
+"""Storage Backends Module
+
+This module provides the storage engines behind the worksheet classes.
+Both engines hand out worksheet objects with the same methods as gspread's
+Worksheet that this project uses: get_all_values, append_row and update.
+"""
+
+# Built-in Modules
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+# Third-party Packages
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import (a1_range_to_grid_range, a1_to_rowcol,
+                           absolute_range_name, rowcol_to_a1)
+
+# Custom Packages
+from worktime import config
+from worktime.worksheets import auth, journal
+
+# Conditional writes tried before giving up on a row that keeps changing.
+CAS_ATTEMPTS = 5
+
+# Header row of each worksheet in the work_time workbook.
+SCHEMAS = {
+    "clockings": ["employee_id", "date", "clocked_in_at", "clocked_out_at"],
+    "employees": ["employee_id", "first_name", "last_name"],
+    "entitlements": ["employee_id", "total", "taken", "planned",
+                     "pending", "unallocated"],
+    "absence_requests": ["request_id", "employee_id", "start_date",
+                         "end_date", "start_time", "end_time", "total_days",
+                         "requested_on", "approved", "cancelled"],
+    "login_credentials": ["employee_id", "password"],
+    "yearly_rollups": ["year", "employee_id", "clocked_days",
+                       "clocked_hours", "absence_days", "absence_hours"],
+}
+
+# Columns to index in the SQLite tables, by worksheet.
+INDEXES = {
+    "clockings": [["employee_id", "date"], ["date"]],
+    "employees": [["employee_id"]],
+    "entitlements": [["employee_id"]],
+    "absence_requests": [["request_id"], ["employee_id"]],
+    "login_credentials": [["employee_id"]],
+    "yearly_rollups": [["year", "employee_id"]],
+}
+
+# Worksheets the archive deletes rows from: the 0-based columns that
+# identify a row. Updates to their rows carry the key and are written to
+# the row that holds it when they are made.
+KEY_COLS = {"clockings": (0, 1), "absence_requests": (0,)}
+
+# Worksheets whose column A holds IDs handed out by append_with_id.
+ID_TITLES = {"absence_requests"}
+
+
+def partition_name(name, year):
+    """Return str: the title of a worksheet's yearly partition.
+
+    Args:
+        name str: The worksheet title, e.g. clockings.
+        year int: The year the partition holds.
+    """
+    return f"{name}_{year}"
+
+
+def sequence_name(name):
+    """Return str: the title of the Google Sheets worksheet that hands out
+    a worksheet's IDs, e.g. absence_requests_ids.
+
+    Args:
+        name str: The worksheet title.
+    """
+    return f"{name}_ids"
+
+
+def get_appended_row(response):
+    """Return int: the 1-based row a Google Sheets append landed in.
+
+    Args:
+        response dict: The values append response.
+    """
+    updated_range = response["updates"]["updatedRange"]
+    return a1_to_rowcol(updated_range.split("!")[-1].split(":")[0])[0]
+
+
+def get_key(title, values):
+    """Return tuple: the values of a row's key columns, see KEY_COLS.
+
+    Args:
+        title str: The worksheet title.
+        values list: The row's values. Trailing blank cells may be left out.
+    """
+    return tuple(str(values[col]) if col < len(values) else ""
+                 for col in KEY_COLS[title])
+
+
+def get_start_row(range_name):
+    """Return int: the 1-based row of an A1 range's top-left cell.
+
+    Args:
+        range_name str: The A1 notation of the cell or range, e.g. "C5".
+    """
+    return a1_to_rowcol(range_name.split(":")[0])[0]
+
+
+def move_range(range_name, row):
+    """Return str: a one-row A1 range moved to another row, e.g. "C5" to
+    "C3" or "A5:F5" to "A3:F3".
+
+    Args:
+        range_name str: The A1 notation of the cell or range.
+        row int: The 1-based row to move it to.
+    """
+    return ":".join(rowcol_to_a1(row, a1_to_rowcol(cell)[1])
+                    for cell in range_name.split(":"))
+
+
+def get_runs(rows):
+    """Return list: (first, last) pairs of consecutive row numbers.
+
+    Args:
+        rows list: 1-based row numbers.
+    """
+    runs = []
+    for row in sorted(set(rows)):
+        if runs and runs[-1][1] == row - 1:
+            runs[-1][1] = row
+        else:
+            runs.append([row, row])
+    return [tuple(run) for run in runs]
+
+
+def get_schema(name):
+    """Return list: the header row of a worksheet or of a yearly partition
+    of one, e.g. clockings_2025.
+
+    Args:
+        name str: The worksheet title.
+    Raises:
+        ValueError: If the worksheet is unknown.
+    """
+    base, _, year = name.rpartition("_")
+    if name not in SCHEMAS and not (base in SCHEMAS and year.isdigit()):
+        raise ValueError(f"Unknown worksheet: {name}")
+    return SCHEMAS.get(name) or SCHEMAS[base]
+
+
+class WriteConflict(journal.Unreachable):
+    """Raised when an increment keeps finding that another writer has
+    changed the cells first. Like an unreachable backend, the same
+    write may succeed if tried again later.
+    """
+
+
+def add_deltas(title, row, values, deltas):
+    """Add numbers to cells of a row's values in place.
+
+    Args:
+        title str: The worksheet title.
+        row int: The 1-based row number.
+        values list: The row's values, as read.
+        deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+    Returns:
+        list: Google Sheets batch update data that writes the new values.
+    """
+    data = []
+    for col, delta in deltas.items():
+        index = ord(col) - 65
+        new_value = int(float(values[index])) + delta
+        values[index] = str(new_value)
+        data.append({"range": absolute_range_name(title, f"{col}{row}"),
+                     "values": [[new_value]]})
+    return data
+
+
+class Backend:
+    """Represent a storage engine that holds the work_time worksheets."""
+
+    def worksheet(self, name):
+        """Return a worksheet object.
+
+        Args:
+            name str: The worksheet title.
+        """
+        raise NotImplementedError
+
+    def batch_update(self, updates, increments=()):
+        """Write several cell ranges, across worksheets, in one request.
+        An update with a key is written to the row that holds the key by
+        then, and dropped if no row does, i.e. it has been archived.
+
+        Args:
+            updates list: Tuples of worksheet title, A1 range,
+                          a list of lists of values, the raw flag and
+                          the key of the range's row or None.
+            increments list: Tuples of worksheet title, 1-based row,
+                             deltas and the row's values as last read,
+                             applied after the updates as increment
+                             applies them.
+        """
+        raise NotImplementedError
+
+    def append_with_id(self, title, values):
+        """Add a row whose column A holds a new ID that no other writer,
+        in this or another process, can be given.
+
+        Args:
+            title str: The worksheet title.
+            values list: Cell values from column A. The first is replaced.
+        Returns:
+            tuple: The ID as a string and the 1-based row number.
+        """
+        raise NotImplementedError
+
+    def increment(self, title, row, deltas, expected=None):
+        """Add numbers to cells of a row where they are stored, so a
+        concurrent change to the same cells is not overwritten.
+        Only the given cells are written.
+
+        Args:
+            title str: The worksheet title.
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+            expected list: The row's values as last read, if known.
+        Returns:
+            list: The row's values after the change.
+        Raises:
+            WriteConflict: If the row keeps changing.
+        """
+        raise NotImplementedError
+
+    def has_worksheet(self, name):
+        """Return bool: True if the worksheet exists.
+
+        Args:
+            name str: The worksheet title.
+        """
+        raise NotImplementedError
+
+    def add_worksheet(self, name):
+        """Create a worksheet with its header row, e.g. a yearly partition.
+
+        Args:
+            name str: The worksheet title. See get_schema.
+        """
+        raise NotImplementedError
+
+    def delete_rows(self, title, rows):
+        """Delete rows. The rows below move up, and the IDs of deleted
+        rows are not handed out again by append_with_id.
+
+        Args:
+            title str: The worksheet title.
+            rows list: 1-based row numbers.
+        """
+        raise NotImplementedError
+
+
+class GoogleSheetsBackend(Backend):
+    """Represent the work_time Google Sheets workbook."""
+
+    def worksheet(self, name):
+        """Return a gspread Worksheet. The workbook is opened lazily.
+
+        Args:
+            name str: The worksheet title.
+        """
+        return auth.get_worksheet(name)
+
+    def batch_update(self, updates, increments=()):
+        """Send the updates with one values_batch_update call per
+        value input option, RAW or USER_ENTERED. Updates with a key are
+        moved to their rows by locate first. The new values of the
+        increments are worked out by add_increments and sent with the
+        RAW updates.
+
+        Args:
+            updates list: Tuples of worksheet title, A1 range,
+                          a list of lists of values, the raw flag and
+                          the key of the range's row or None.
+            increments list: Tuples of worksheet title, 1-based row,
+                             deltas and the row's values as last read.
+        Raises:
+            WriteConflict: If a row of the increments keeps changing.
+        """
+        updates = self.locate(updates)
+        added = self.add_increments(increments)[0] if increments else []
+        for raw in (True, False):
+            data = [{"range": absolute_range_name(title, range_name),
+                     "values": values}
+                    for title, range_name, values, is_raw, _ in updates
+                    if is_raw == raw]
+            if raw:
+                data.extend(added)
+            if data:
+                option = "RAW" if raw else "USER_ENTERED"
+                auth.get_spreadsheet().values_batch_update(
+                    body={"valueInputOption": option, "data": data})
+
+    def locate(self, updates):
+        """Check that the rows of the updates with a key still hold it,
+        reading them in one values_batch_get call, and move the updates
+        whose rows have moved to where their keys are now. Those keys are
+        looked up in one more read of the worksheet's key columns. Google
+        Sheets cannot write conditionally, so only the round trip of the
+        write is left for the archive to move a row in.
+
+        Args:
+            updates list: Tuples of worksheet title, A1 range,
+                          a list of lists of values, the raw flag and
+                          the key of the range's row or None.
+        Returns:
+            list: The updates to send. Those whose key no row holds any
+                  more are left out.
+        """
+        keyed = [(title, get_start_row(range_name))
+                 for title, range_name, *_, key in updates
+                 if key is not None]
+        if not keyed:
+            return updates
+        response = auth.get_spreadsheet().values_batch_get(
+            [absolute_range_name(title, f"{row}:{row}")
+             for title, row in keyed])
+        read = iter(response["valueRanges"])
+        located = []
+        rows = {}
+        for title, range_name, values, raw, key in updates:
+            if key is not None:
+                cells = next(read).get("values", [[]])[0]
+                if get_key(title, cells) != tuple(key):
+                    if title not in rows:
+                        rows[title] = self.get_key_rows(title)
+                    row = rows[title].get(tuple(key))
+                    if row is None:
+                        continue
+                    range_name = move_range(range_name, row)
+            located.append((title, range_name, values, raw, key))
+        return located
+
+    def get_key_rows(self, title):
+        """Return dict: each key of a worksheet to the first row with it.
+
+        Args:
+            title str: The worksheet title. See KEY_COLS.
+        """
+        last_col = chr(65 + max(KEY_COLS[title]))
+        values = self.worksheet(title).get(f"A2:{last_col}")
+        rows = {}
+        for row, cells in enumerate(values, start=2):
+            rows.setdefault(get_key(title, cells), row)
+        return rows
+
+    def append_with_id(self, title, values):
+        """Take the next ID from the worksheet's sequence, see next_id,
+        then append the row with it. The row never holds any other ID,
+        so a failed request or a killed process can at most skip an ID.
+
+        Args:
+            title str: The worksheet title.
+            values list: Cell values from column A. The first is replaced.
+        Returns:
+            tuple: The ID as a string and the 1-based row number.
+        """
+        id_ = self.next_id(title)
+        response = self.worksheet(title).append_row(
+            [id_, *values[1:]], value_input_option="RAW")
+        return id_, get_appended_row(response)
+
+    def next_id(self, title):
+        """Append a row to the worksheet's sequence worksheet and take
+        its row - 1 as the next ID. Google Sheets gives each row to one
+        append only, and no rows are ever deleted from the sequence
+        worksheet, so the IDs do not depend on the worksheet's own rows.
+
+        Args:
+            title str: The worksheet title.
+        Returns:
+            str: The ID.
+        """
+        name = sequence_name(title)
+        try:
+            sequence = auth.get_worksheet(name)
+        except WorksheetNotFound:
+            self.add_sequence(title)
+            sequence = auth.get_worksheet(name)
+        response = sequence.append_row(
+            [datetime.now().isoformat(timespec="seconds")],
+            value_input_option="RAW")
+        return str(get_appended_row(response) - 1)
+
+    def add_sequence(self, title):
+        """Create a worksheet's sequence worksheet with one row for each
+        ID up to the highest in column A, so the sequence carries on after
+        it. The worksheet and its rows are added in one batch update, so
+        no append can land in it before they are there. If another
+        terminal has just created it, that one is used.
+
+        Args:
+            title str: The worksheet title.
+        """
+        ids = self.worksheet(title).col_values(1)[1:]
+        highest = max((int(id_) for id_ in ids if id_.isdigit()), default=0)
+        sheet_id = random.randrange(1, 2 ** 31)
+        cells = ["issued_at"] + ["unknown"] * highest
+        try:
+            auth.get_spreadsheet().batch_update({"requests": [
+                {"addSheet": {"properties": {
+                    "sheetId": sheet_id, "title": sequence_name(title),
+                    "gridProperties": {"rowCount": len(cells),
+                                       "columnCount": 1}}}},
+                {"updateCells": {
+                    "start": {"sheetId": sheet_id},
+                    "rows": [{"values": [
+                        {"userEnteredValue": {"stringValue": value}}]}
+                        for value in cells],
+                    "fields": "userEnteredValue"}}]})
+        except APIError:
+            if not self.has_worksheet(sequence_name(title)):
+                raise
+
+    def increment(self, title, row, deltas, expected=None):
+        """Write the changed cells in one batch update, worked out by
+        add_increments.
+
+        Args:
+            title str: The worksheet title.
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+            expected list: The row's values as last read, if known.
+        Returns:
+            list: The row's values after the change.
+        Raises:
+            WriteConflict: If the row keeps changing.
+        """
+        data, rows = self.add_increments([(title, row, deltas, expected)])
+        auth.get_spreadsheet().values_batch_update(
+            body={"valueInputOption": "RAW", "data": data})
+        return rows[0]
+
+    def add_increments(self, increments):
+        """Read the increments' rows again in one values_batch_get call
+        and work out their new cells, provided the cells still hold what
+        the caller read. Google Sheets cannot add in place or write
+        conditionally, so a row that has changed is read again and checked
+        once more, after a short jittered back-off. Only the round trip
+        of the write is left for a change to be lost in.
+
+        Args:
+            increments list: Tuples of worksheet title, 1-based row,
+                             deltas and the row's values as last read,
+                             or None to check against a second read.
+        Returns:
+            tuple: Google Sheets batch update data that writes the new
+                   cells, and the rows' values after the change.
+        Raises:
+            WriteConflict: If a row keeps changing.
+        """
+        expected = [values for *_, values in increments]
+        for attempt in range(CAS_ATTEMPTS):
+            response = auth.get_spreadsheet().values_batch_get(
+                [absolute_range_name(title, f"{row}:{row}")
+                 for title, row, *_ in increments])
+            rows = [value_range.get("values", [[]])[0]
+                    for value_range in response["valueRanges"]]
+            if all(values is not None and
+                   get_cells(current, deltas) == get_cells(values, deltas)
+                   for (_, _, deltas, _), current, values
+                   in zip(increments, rows, expected)):
+                data = []
+                for (title, row, deltas, _), values in zip(increments, rows):
+                    data.extend(add_deltas(title, row, values, deltas))
+                return data, rows
+            expected = rows
+            # Back off a little, so two terminals do not retry in step.
+            time.sleep(random.uniform(0, 0.05 * (attempt + 1)))
+        raise WriteConflict("The rows to add to keep changing.")
+
+    def has_worksheet(self, name):
+        """Return bool: True if the worksheet exists.
+
+        Args:
+            name str: The worksheet title.
+        """
+        try:
+            auth.get_worksheet(name)
+        except WorksheetNotFound:
+            return False
+        return True
+
+    def add_worksheet(self, name):
+        """Create a worksheet with its header row, e.g. a yearly partition.
+
+        Args:
+            name str: The worksheet title. See get_schema.
+        """
+        headers = get_schema(name)
+        worksheet = auth.get_spreadsheet().add_worksheet(
+            title=name, rows=1, cols=len(headers))
+        worksheet.update("A1", [headers], raw=True)
+
+    def delete_rows(self, title, rows):
+        """Delete rows in one batch update, the lowest run of rows last.
+        The worksheet's sequence is started first if it hands out IDs,
+        so it carries on after the highest ID, deleted or not.
+
+        Args:
+            title str: The worksheet title.
+            rows list: 1-based row numbers.
+        """
+        if not rows:
+            return
+        if (title in ID_TITLES and
+                not self.has_worksheet(sequence_name(title))):
+            self.add_sequence(title)
+        sheet_id = self.worksheet(title).id
+        auth.get_spreadsheet().batch_update({"requests": [
+            {"deleteDimension": {"range": {
+                "sheetId": sheet_id, "dimension": "ROWS",
+                "startIndex": first - 1, "endIndex": last}}}
+            for first, last in reversed(get_runs(rows))]})
+
+
+class SQLiteBackend(Backend):
+    """Represent a local SQLite file with one table per worksheet.
+    Each table keeps the sheet's 1-based row number as its primary key,
+    and the header row is stored as row 1.
+
+    Args:
+        path str: The database file path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.create_tables()
+
+    def create_tables(self):
+        """Create missing tables, their indexes and header rows."""
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sequences "
+                              "(name TEXT PRIMARY KEY, value INTEGER)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS applied_writes "
+                              "(key TEXT PRIMARY KEY)")
+            for name in SCHEMAS:
+                self.create_table(name)
+
+    def create_table(self, name):
+        """Create a missing table, its indexes and header row.
+        The caller holds the lock and commits the transaction.
+
+        Args:
+            name str: The worksheet title. See get_schema.
+        """
+        headers = get_schema(name)
+        columns = ", ".join(f"{col} TEXT NOT NULL DEFAULT ''"
+                            for col in headers)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {name} "
+                          f"(row INTEGER PRIMARY KEY, {columns})")
+        for cols in INDEXES.get(name, []):
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"{name}_{'_'.join(cols)}_idx "
+                f"ON {name} ({', '.join(cols)})")
+        placeholders = ", ".join("?" * (len(headers) + 1))
+        self.conn.execute(f"INSERT OR IGNORE INTO {name} "
+                          f"VALUES ({placeholders})", [1, *headers])
+
+    def worksheet(self, name):
+        """Return a SQLiteWorksheet.
+
+        Args:
+            name str: The worksheet title.
+        Raises:
+            ValueError: If the worksheet is unknown or does not exist.
+        """
+        get_schema(name)
+        if name not in SCHEMAS and not self.has_worksheet(name):
+            raise ValueError(f"Unknown worksheet: {name}")
+        return SQLiteWorksheet(self, name)
+
+    def has_worksheet(self, name):
+        """Return bool: True if the worksheet's table exists.
+
+        Args:
+            name str: The worksheet title.
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = ?", [name]).fetchone() is not None
+
+    def add_worksheet(self, name):
+        """Create a table with its header row, e.g. a yearly partition.
+
+        Args:
+            name str: The worksheet title. See get_schema.
+        """
+        with self.lock, self.conn:
+            self.create_table(name)
+
+    def batch_update(self, updates, increments=()):
+        """Apply the updates and then the increments in a single
+        transaction, so either all of them are made or none. Updates
+        with a key are moved to their rows by locate in the same
+        transaction.
+
+        Args:
+            updates list: Tuples of worksheet title, A1 range,
+                          a list of lists of values, the raw flag and
+                          the key of the range's row or None.
+            increments list: Tuples of worksheet title, 1-based row,
+                             deltas and the row's values as last read,
+                             which are not needed to add in place.
+        """
+        with self.lock, self.conn:
+            for title, range_name, values, _, key in updates:
+                if key is not None:
+                    range_name = self.locate(title, range_name, key)
+                    if range_name is None:
+                        continue
+                self.worksheet(title).write_range(range_name, values)
+            for title, row, deltas, _ in increments:
+                self.add_to_row(title, row, deltas)
+
+    def locate(self, title, range_name, key):
+        """Return the range moved to the row that holds the key: its own
+        row if that still does, otherwise the first one. The caller holds
+        the lock.
+
+        Args:
+            title str: The worksheet title. See KEY_COLS.
+            range_name str: The A1 notation of a one-row range.
+            key list: The row's values of the key columns.
+        Returns:
+            str: The A1 range, None if no row holds the key.
+        """
+        columns = [get_schema(title)[col] for col in KEY_COLS[title]]
+        condition = " AND ".join(f"{col} = ?" for col in columns)
+        found = self.conn.execute(
+            f"SELECT row FROM {title} WHERE row > 1 AND {condition} "
+            "ORDER BY row = ? DESC, row LIMIT 1",
+            [*key, get_start_row(range_name)]).fetchone()
+        return None if found is None else move_range(range_name, found[0])
+
+    def run_once(self, key, write):
+        """Make a journaled write unless one with the same idempotency key
+        has been made. The key is stored in the write's own transaction,
+        so either both are kept or neither is.
+
+        Args:
+            key str: The write's idempotency key.
+            write function: Makes the write through this backend.
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO applied_writes (key) VALUES (?)", [key])
+            if cursor.rowcount:
+                # Commits the key together with the write.
+                write()
+
+    def append_with_id(self, title, values):
+        """Take the next value of the worksheet's sequence and append the
+        row in the same transaction. The sequence starts after the highest
+        ID in column A, and SQLite lets one writer at a time update it.
+
+        Args:
+            title str: The worksheet title.
+            values list: Cell values from column A. The first is replaced.
+        Returns:
+            tuple: The ID as a string and the 1-based row number.
+        """
+        worksheet = self.worksheet(title)
+        with self.lock, self.conn:
+            self.start_sequence(title)
+            self.conn.execute(
+                "UPDATE sequences SET value = value + 1 WHERE name = ?",
+                [title])
+            id_ = str(self.conn.execute(
+                "SELECT value FROM sequences WHERE name = ?",
+                [title]).fetchone()[0])
+            row = worksheet.last_row() + 1
+            worksheet.write_row(row, 0, [id_, *values[1:]])
+        return id_, row
+
+    def start_sequence(self, title):
+        """Start the worksheet's ID sequence after its highest ID, unless
+        it has been started. The caller holds the lock and commits.
+
+        Args:
+            title str: The worksheet title.
+        """
+        id_col = get_schema(title)[0]
+        self.conn.execute(
+            "INSERT OR IGNORE INTO sequences (name, value) "
+            f"SELECT ?, COALESCE(MAX(CAST({id_col} AS INTEGER)), 0) "
+            f"FROM {title} WHERE row > 1", [title])
+
+    def delete_rows(self, title, rows):
+        """Delete rows and renumber the rows below them in one
+        transaction. The ID sequence is started first, so the IDs of
+        the deleted rows are not handed out again.
+
+        Args:
+            title str: The worksheet title.
+            rows list: 1-based row numbers.
+        """
+        if not rows:
+            return
+        deleted = sorted(set(rows))
+        with self.lock, self.conn:
+            if title in ID_TITLES:
+                self.start_sequence(title)
+            self.conn.executemany(f"DELETE FROM {title} WHERE row = ?",
+                                  [[row] for row in deleted])
+            below = [row for (row,) in self.conn.execute(
+                f"SELECT row FROM {title} WHERE row > ? ORDER BY row",
+                [deleted[0]])]
+            # Negate first so the new numbers never clash with old ones.
+            self.conn.execute(f"UPDATE {title} SET row = -row WHERE row > ?",
+                              [deleted[0]])
+            self.conn.executemany(
+                f"UPDATE {title} SET row = ? WHERE row = ?",
+                [[row - bisect_left(deleted, row), -row] for row in below])
+
+    def increment(self, title, row, deltas, expected=None):
+        """Add to the cells with one UPDATE, which SQLite applies to the
+        stored values, and read the row back in the same transaction.
+
+        Args:
+            title str: The worksheet title.
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+            expected list: Not needed to add in place.
+        Returns:
+            list: The row's values after the change.
+        """
+        worksheet = self.worksheet(title)
+        with self.lock, self.conn:
+            self.add_to_row(title, row, deltas)
+            values = self.conn.execute(
+                f"SELECT {', '.join(worksheet.columns)} FROM {title} "
+                "WHERE row = ?", [row]).fetchone()
+        return list(values)
+
+    def add_to_row(self, title, row, deltas):
+        """Add to the cells with one UPDATE. The caller holds the lock
+        and commits the transaction.
+
+        Args:
+            title str: The worksheet title.
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+        """
+        columns = [get_schema(title)[ord(col) - 65] for col in deltas]
+        assignments = ", ".join(
+            f"{col} = CAST(CAST({col} AS INTEGER) + ? AS TEXT)"
+            for col in columns)
+        self.conn.execute(f"UPDATE {title} SET {assignments} WHERE row = ?",
+                          [*deltas.values(), row])
+
+
+class SQLiteWorksheet:
+    """Represent a worksheet stored in a SQLiteBackend table.
+
+    Args:
+        backend SQLiteBackend: The database the table belongs to.
+        name str: The worksheet title.
+    """
+
+    def __init__(self, backend, name):
+        self.backend = backend
+        self.title = name
+        self.columns = get_schema(name)
+
+    def get_all_values(self):
+        """Return a list of lists containing all cell values as strings,
+        header row included.
+        """
+        with self.backend.lock:
+            rows = self.backend.conn.execute(
+                f"SELECT {', '.join(self.columns)} FROM {self.title} "
+                "ORDER BY row").fetchall()
+        return [list(row) for row in rows]
+
+    def append_row(self, values, value_input_option="RAW"):
+        """Add a row after the last row of the table.
+
+        Args:
+            values list: Cell values from column A.
+            value_input_option str: Accepted for gspread compatibility.
+                                    Values are always stored as strings.
+        """
+        self.append_rows([values], value_input_option)
+
+    def append_rows(self, values, value_input_option="RAW"):
+        """Add rows after the last row of the table.
+
+        Args:
+            values list: A list of lists of cell values from column A.
+            value_input_option str: Accepted for gspread compatibility.
+        """
+        with self.backend.lock, self.backend.conn:
+            last_row = self.last_row()
+            for offset, row_values in enumerate(values, start=1):
+                self.write_row(last_row + offset, 0, row_values)
+
+    def update(self, range_name, values=None, raw=True):
+        """Set values in a cell range, e.g. "C5" or "C5:F5".
+
+        Args:
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values, or a single value.
+            raw bool: Accepted for gspread compatibility.
+        """
+        if not isinstance(values, list):
+            values = [[values]]
+        with self.backend.lock, self.backend.conn:
+            self.write_range(range_name, values)
+
+    def write_range(self, range_name, values):
+        """Write a list of lists of values from the range's top-left cell.
+        The caller holds the lock and commits the transaction.
+
+        Args:
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values.
+        """
+        start_row, start_col = a1_to_rowcol(range_name.split(":")[0])
+        for offset, row_values in enumerate(values):
+            self.write_row(start_row + offset, start_col - 1, row_values)
+
+    def get(self, range_name):
+        """Return a list of lists of the cell values in a range, as
+        gspread's Worksheet.get does.
+
+        Args:
+            range_name str: The A1 notation of the range, e.g. "A5:D9",
+                            or "B5:B" for the rest of a column.
+        """
+        with self.backend.lock:
+            return self.read_range(range_name)
+
+    def read_range(self, range_name):
+        """Return a list of lists of the cell values in a range.
+        The caller holds the lock.
+
+        Args:
+            range_name str: The A1 notation of the range, e.g. "E5:F5".
+                            Without an end row it runs to the last row.
+        """
+        grid = a1_range_to_grid_range(range_name)
+        columns = self.columns[grid["startColumnIndex"]:
+                               grid["endColumnIndex"]]
+        rows = self.backend.conn.execute(
+            f"SELECT {', '.join(columns)} FROM {self.title} "
+            "WHERE row > ? AND row <= ? ORDER BY row",
+            [grid.get("startRowIndex", 0),
+             grid.get("endRowIndex", sys.maxsize)]).fetchall()
+        return [list(row) for row in rows]
+
+    def last_row(self):
+        """Return int: the 1-based number of the last row in the table."""
+        result = self.backend.conn.execute(
+            f"SELECT MAX(row) FROM {self.title}").fetchone()[0]
+        return result or 0
+
+    def write_row(self, row, first_col, values):
+        """Insert the row if it is missing, then set its cell values.
+
+        Args:
+            row int: The 1-based row number.
+            first_col int: The 0-based column index of the first value.
+            values list: Cell values.
+        """
+        columns = self.columns[first_col:first_col + len(values)]
+        self.backend.conn.execute(
+            f"INSERT OR IGNORE INTO {self.title} (row) VALUES (?)", [row])
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        self.backend.conn.execute(
+            f"UPDATE {self.title} SET {assignments} WHERE row = ?",
+            [*map(str, values[:len(columns)]), row])
+
+
+def get_cells(values, deltas):
+    """Return list: the cells of a row's values that deltas add to, blank
+    where the row is shorter.
+
+    Args:
+        values list: The row's values.
+        deltas dict: Column letter to a number, e.g. {"E": 8}.
+    """
+    return [str(values[ord(col) - 65]) if ord(col) - 65 < len(values)
+            else "" for col in deltas]
+
+
+def copy_worksheets(source, target):
+    """Copy every worksheet from one backend to another, e.g. to take
+    a local SQLite copy of the Google Sheets workbook.
+
+    Args:
+        source Backend: The backend to read from.
+        target SQLiteBackend: An empty backend to write to.
+    """
+    for name in SCHEMAS:
+        rows = source.worksheet(name).get_all_values()[1:]
+        if rows:
+            target.worksheet(name).append_rows(rows)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Return the backend selected by config.BACKEND, built once per process.
+    Its writes go through the write-ahead journal at config.JOURNAL_PATH.
+
+    Raises:
+        ValueError: If the configured backend name is unknown.
+    """
+    if config.BACKEND == "sqlite":
+        backend = SQLiteBackend(config.SQLITE_PATH)
+    elif config.BACKEND == "gsheets":
+        backend = GoogleSheetsBackend()
+    else:
+        raise ValueError(f"Unknown storage backend: {config.BACKEND}")
+    return journal.JournaledBackend(backend, config.JOURNAL_PATH)
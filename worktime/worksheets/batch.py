@@ -0,0 +1,137 @@
+"""Batch Module
+
+This module provides a unit of work for worksheet writes. Inside a
+"with Batch():" block, update, increment and append_row calls on cached
+worksheets are collected instead of sent one by one. When the block ends,
+all cell and range updates and increments go to the backend in a single
+batch update and the appends in one append_rows request per worksheet.
+"""
+
+# Built-in Modules
+import threading
+
+# Custom Packages
+from worktime.worksheets import backends, cache
+
+_local = threading.local()
+
+
+class Batch:
+    """Represent a unit of work that collects pending worksheet writes.
+    Nested batches join the outermost one, which sends everything.
+
+    Args:
+        backend Backend: The backend to write to. The active one if None.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or backends.get_backend()
+        self.updates = []
+        self.increments = []
+        self.appends = {}
+        self.titles = set()
+
+    def __enter__(self):
+        stack = _stack()
+        stack.append(stack[0] if stack else self)
+        return stack[-1]
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        stack = _stack()
+        stack.pop()
+        if stack:
+            return
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def add_update(self, title, range_name, values, raw=True, key=None):
+        """Queue a cell or range update.
+
+        Args:
+            title str: The worksheet title.
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values, or a single value.
+            raw bool: True to store the values as-is.
+            key list: The key of the range's row, see backends.KEY_COLS,
+                      to write to the row that holds it. None to write
+                      to the range as given.
+        """
+        if not isinstance(values, list):
+            values = [[values]]
+        self.updates.append((title, range_name, values, raw, key))
+        self.titles.add(title)
+
+    def add_increment(self, title, row, deltas, expected=None):
+        """Queue numbers to add to cells of a row.
+
+        Args:
+            title str: The worksheet title.
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+            expected list: The row's values as last read, if known.
+        """
+        self.increments.append((title, row, deltas, expected))
+        self.titles.add(title)
+
+    def add_append(self, worksheet, values, value_input_option="RAW"):
+        """Queue a new row.
+
+        Args:
+            worksheet object: The backend worksheet to append to.
+            values list: Cell values from column A.
+            value_input_option str: How the backend interprets the values.
+        """
+        key = (worksheet.title, value_input_option)
+        self.appends.setdefault(key, (worksheet, []))[1].append(values)
+        self.titles.add(worksheet.title)
+
+    def flush(self):
+        """Send the pending writes to the backend and clear the queue.
+        If sending fails, the patched snapshots are dropped.
+        """
+        updates, increments = self.updates, self.increments
+        appends, titles = self.appends, self.titles
+        self.clear()
+        try:
+            if updates or increments:
+                self.backend.batch_update(updates, increments)
+            for (_, input_option), (worksheet, rows) in appends.items():
+                worksheet.append_rows(rows, value_input_option=input_option)
+        except Exception:
+            invalidate(titles)
+            raise
+
+    def discard(self):
+        """Drop the pending writes and the snapshots they have patched."""
+        invalidate(self.titles)
+        self.clear()
+
+    def clear(self):
+        """Empty the queue, leaving the snapshots as they are."""
+        self.updates, self.increments = [], []
+        self.appends, self.titles = {}, set()
+
+
+def invalidate(titles):
+    """Drop the cached snapshots of the worksheets.
+
+    Args:
+        titles set: Worksheet titles.
+    """
+    for title in titles:
+        cache.CACHE.invalidate(title)
+
+
+def _stack():
+    """Return list: the batches opened in the current thread."""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current():
+    """Return Batch: the open batch of the current thread, or None."""
+    stack = _stack()
+    return stack[0] if stack else None
@@ -0,0 +1,497 @@
+"""Snapshot Cache Module
+
+This module keeps one downloaded copy (snapshot) of each worksheet per
+process, so the worksheet classes built by different menu options share
+a single read. Writes go to the backend first and then patch the cached
+snapshot, which saves downloading the worksheet again.
+Each snapshot also builds hash indexes on demand, e.g. employee ID to row,
+so lookups do not scan every row, and parses its date columns once.
+Groupings, e.g. request status and employee ID to rows, are kept up to
+date on every write, so a filter on them costs as much as its result.
+Rows are tuples: a write replaces a row rather than changing it, so rows
+handed out to readers are shared with the snapshot instead of copied.
+Repeated cell values, e.g. employee IDs and dates, are stored only once.
+Filters read typed columns - dates as ordinals, times as seconds and
+flags as small integers - kept in arrays next to the rows.
+"""
+
+# Built-in Modules
+from array import array
+from bisect import insort
+import threading
+import time
+
+# Third-party Packages
+from gspread.utils import a1_to_rowcol
+
+# Custom Packages
+from worktime import config
+from worktime.app import utility
+from worktime.worksheets import backends, batch, journal
+
+# Status codes of the approved and cancelled columns.
+UNDECIDED = 0
+TRUE = 1
+FALSE = 2
+STATUS_CODES = {"/": UNDECIDED, "True": TRUE, "False": FALSE}
+# Value of a typed cell that is blank or cannot be parsed.
+MISSING = -1
+
+
+def parse_date(cell):
+    """Return int: a DD/MM/YYYY cell as an ordinal, MISSING if invalid."""
+    ordinal = utility.to_ordinal(cell)
+    return MISSING if ordinal is None else ordinal
+
+
+def parse_time(cell):
+    """Return int: a HH:MM(:SS) cell in seconds, MISSING if invalid."""
+    seconds = utility.to_seconds(cell)
+    return MISSING if seconds is None else seconds
+
+
+def parse_status(cell):
+    """Return int: a /, True or False cell as a status code."""
+    return STATUS_CODES.get(cell, MISSING)
+
+
+# Typed column kind: array type code and the cell parser.
+KINDS = {
+    "date": ("l", parse_date),
+    "time": ("l", parse_time),
+    "status": ("b", parse_status),
+}
+
+
+class Snapshot:
+    """Represent all values of a worksheet at the time it was read.
+    Each row is an immutable tuple of strings.
+
+    Args:
+        values list: A list of lists from get_all_values, header included.
+    """
+
+    def __init__(self, values):
+        # One string object per distinct cell value.
+        self.pool = {}
+        self.values = [self.intern(row) for row in values]
+        self.width = max((len(row) for row in values), default=0)
+        self.loaded_at = time.monotonic()
+        self.indexes = {}
+        self.groupings = {}
+        self.columns = {}
+
+    def intern(self, row):
+        """Return tuple: the row's values as strings from the pool.
+
+        Args:
+            row list: Cell values.
+        """
+        pool = self.pool
+        return tuple(pool.setdefault(cell, cell)
+                     for cell in map(str, row))
+
+    def is_fresh(self, ttl):
+        """Return bool: True if the snapshot is younger than ttl seconds."""
+        return time.monotonic() - self.loaded_at < ttl
+
+    def index(self, cols):
+        """Return the index on the given columns, building it on first use.
+
+        Args:
+            cols tuple: 0-based column indexes that make up the key.
+        Returns:
+            dict: Key tuple to the 1-based row number of its first row.
+        """
+        index = self.indexes.get(cols)
+        if index is None:
+            index = {}
+            for row, values in enumerate(self.values[1:], start=2):
+                index.setdefault(tuple(values[col] for col in cols), row)
+            self.indexes[cols] = index
+        return index
+
+    def groups(self, cols):
+        """Return the grouping on the given columns, building it on first
+        use. Unlike an index it keeps every row of a key, and it is moved
+        along when a row's values change instead of being rebuilt.
+
+        Args:
+            cols tuple: 0-based column indexes that make up the key.
+        Returns:
+            dict: Key tuple to the sorted 1-based row numbers with it.
+        """
+        grouping = self.groupings.get(cols)
+        if grouping is None:
+            grouping = {}
+            for row, values in enumerate(self.values[1:], start=2):
+                key = tuple(values[col] for col in cols)
+                grouping.setdefault(key, []).append(row)
+            self.groupings[cols] = grouping
+        return grouping
+
+    def column(self, col, kind):
+        """Return a column parsed into an array, building it on first use.
+        Cells that cannot be parsed, the header included, are MISSING.
+
+        Args:
+            col int: The 0-based column index.
+            kind str: date, time or status - see KINDS.
+        Returns:
+            array: A number per row, aligned with self.values.
+        """
+        column = self.columns.get((col, kind))
+        if column is None:
+            typecode, parse = KINDS[kind]
+            column = array(typecode, [parse(row[col]) if col < len(row)
+                                      else MISSING for row in self.values])
+            self.columns[(col, kind)] = column
+        return column
+
+    def append(self, values):
+        """Add a row to the end of the snapshot.
+
+        Args:
+            values list: Cell values from column A.
+        """
+        self.set_row(len(self.values), 0, values)
+
+    def update(self, range_name, values):
+        """Set cell values as the worksheet's update() does.
+
+        Args:
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values, or a single value.
+        """
+        if not isinstance(values, list):
+            values = [[values]]
+        start_row, start_col = a1_to_rowcol(range_name.split(":")[0])
+        for offset, row_values in enumerate(values):
+            self.set_row(start_row - 1 + offset, start_col - 1, row_values)
+
+    def set_row(self, index, first_col, values):
+        """Write values into a row, adding blank rows and cells if needed.
+        Values are stored as strings, as get_all_values() returns them.
+        The row is replaced by a new tuple, so readers holding the old
+        one are not affected.
+
+        Args:
+            index int: The 0-based row index, header included.
+            first_col int: The 0-based column index of the first value.
+            values list: Cell values.
+        """
+        is_new_row = index == len(self.values)
+        if index > len(self.values):
+            # Blank rows in between would need re-keying: rebuild on demand.
+            self.indexes.clear()
+            self.groupings.clear()
+        last_col = first_col + len(values)
+        moved = [cols for cols in self.groupings
+                 if is_new_row or any(first_col <= col < last_col
+                                      for col in cols)]
+        if not is_new_row:
+            for cols in moved:
+                self.ungroup(cols, index)
+
+        self.width = max(self.width, last_col)
+        while len(self.values) <= index:
+            self.values.append(("",) * self.width)
+        row = list(self.values[index])
+        row.extend([""] * (self.width - len(row)))
+        row[first_col:last_col] = values
+        row = self.values[index] = self.intern(row)
+
+        for cols in moved:
+            key = tuple(row[col] for col in cols)
+            insort(self.groupings[cols].setdefault(key, []), index + 1)
+        for (col, kind), column in self.columns.items():
+            column.extend([MISSING] * (len(self.values) - len(column)))
+            if first_col <= col < last_col:
+                column[index] = KINDS[kind][1](row[col])
+        for cols in list(self.indexes):
+            if is_new_row:
+                key = tuple(row[col] for col in cols)
+                self.indexes[cols].setdefault(key, index + 1)
+            elif any(first_col <= col < last_col for col in cols):
+                del self.indexes[cols]
+
+    def ungroup(self, cols, index):
+        """Take a row out of its group before its key changes.
+
+        Args:
+            cols tuple: The grouping's 0-based column indexes.
+            index int: The 0-based row index, header included.
+        """
+        row = self.values[index]
+        key = tuple(row[col] if col < len(row) else "" for col in cols)
+        rows = self.groupings[cols].get(key, [])
+        if index + 1 in rows:
+            rows.remove(index + 1)
+            if not rows:
+                del self.groupings[cols][key]
+
+
+class SnapshotCache:
+    """Represent the process-wide snapshots keyed by worksheet name.
+
+    Args:
+        ttl float: Seconds a snapshot is served before it is read again.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.snapshots = {}
+        self.lock = threading.RLock()
+
+    def get(self, name, loader):
+        """Return the worksheet's snapshot, reading it if missing or stale.
+        If the backend cannot be reached, a stale snapshot is served.
+
+        Args:
+            name str: The worksheet title.
+            loader function: Returns the worksheet's get_all_values().
+        Returns:
+            Snapshot: The shared snapshot.
+        """
+        with self.lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is None or not snapshot.is_fresh(self.ttl):
+                try:
+                    self.snapshots[name] = Snapshot(loader())
+                except Exception as error:
+                    if snapshot is None or not journal.is_unreachable(error):
+                        raise
+                    # Offline: keep serving the old snapshot for a while.
+                    snapshot.loaded_at = time.monotonic()
+                snapshot = self.snapshots[name]
+            return snapshot
+
+    def cached(self, name):
+        """Return the worksheet's snapshot if it is fresh, None otherwise.
+
+        Args:
+            name str: The worksheet title.
+        """
+        with self.lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is not None and not snapshot.is_fresh(self.ttl):
+                del self.snapshots[name]
+                snapshot = None
+            return snapshot
+
+    def expire(self, name):
+        """Make a worksheet's snapshot stale, so the next read fetches it
+        again but can still fall back on it if the backend is unreachable.
+
+        Args:
+            name str: The worksheet title.
+        """
+        with self.lock:
+            snapshot = self.snapshots.get(name)
+            if snapshot is not None:
+                snapshot.loaded_at -= self.ttl
+
+    def invalidate(self, name=None):
+        """Drop one worksheet's snapshot, or all of them.
+
+        Args:
+            name str: The worksheet title. All worksheets if None.
+        """
+        with self.lock:
+            if name is None:
+                self.snapshots.clear()
+            else:
+                self.snapshots.pop(name, None)
+
+
+CACHE = SnapshotCache(config.CACHE_TTL)
+
+
+class CachedWorksheet:
+    """Represent a backend worksheet whose reads are served from CACHE.
+    It offers the same get_all_values, append_row and update methods.
+
+    Args:
+        worksheet object: A worksheet handed out by a storage backend.
+        backend Backend: The backend it belongs to. The active one if None.
+    """
+
+    def __init__(self, worksheet, backend=None):
+        self.worksheet = worksheet
+        self.backend = backend or backends.get_backend()
+        self.title = worksheet.title
+
+    def snapshot(self):
+        """Return Snapshot: the shared snapshot of this worksheet."""
+        return CACHE.get(self.title, self.worksheet.get_all_values)
+
+    def get_all_values(self):
+        """Return a list of tuples containing all cell values, header row
+        included. The rows are the snapshot's own, which cannot change.
+        """
+        with CACHE.lock:
+            return list(self.snapshot().values)
+
+    def find(self, cols, key):
+        """Look up the first row whose columns match the key.
+
+        Args:
+            cols tuple: 0-based column indexes, e.g. (0, 1).
+            key tuple: Values of those columns, e.g. (ID, date).
+        Returns:
+            tuple: The 1-based row number and the row's values.
+            None: If no row matches.
+        """
+        with CACHE.lock:
+            snapshot = self.snapshot()
+            row = snapshot.index(cols).get(key)
+            if row is None:
+                return None
+            return row, snapshot.values[row - 1]
+
+    def groups(self, cols, prefix=()):
+        """Return the rows grouped by the values of some columns, from a
+        grouping the snapshot keeps up to date.
+
+        Args:
+            cols tuple: 0-based column indexes that make up the key.
+            prefix tuple: Only keys starting with these values, e.g. a
+                          status when the key is status and employee ID.
+        Returns:
+            dict: Key tuple to its rows' values, in row order.
+        """
+        with CACHE.lock:
+            snapshot = self.snapshot()
+            return {key: [snapshot.values[row - 1] for row in rows]
+                    for key, rows in snapshot.groups(cols).items()
+                    if key[:len(prefix)] == prefix}
+
+    def select(self, cols, key, *specs):
+        """Return the rows of one group with some columns taken from the
+        snapshot's typed arrays, so filters compare integers instead of
+        parsing strings. Only the group's rows are read, found through a
+        grouping the snapshot keeps up to date.
+
+        Args:
+            cols tuple: 0-based column indexes that make up the key.
+            key tuple: The group's values of those columns.
+            *specs: (0-based column index, kind) tuples, e.g. (2, "date").
+        Returns:
+            list: (row's values, tuple of typed values) pairs, in row order.
+        """
+        with CACHE.lock:
+            snapshot = self.snapshot()
+            columns = [snapshot.column(*spec) for spec in specs]
+            return [(snapshot.values[row - 1],
+                     tuple(column[row - 1] for column in columns))
+                    for row in snapshot.groups(cols).get(key, [])]
+
+    def append_row(self, values, value_input_option="RAW"):
+        """Add a row to the worksheet and the cached snapshot.
+        Inside a batch.Batch block the row is queued instead.
+
+        Args:
+            values list: Cell values from column A.
+            value_input_option str: How the backend interprets the values.
+        """
+        pending = batch.current()
+        if pending is None:
+            response = self.worksheet.append_row(
+                values, value_input_option=value_input_option)
+        else:
+            pending.add_append(self.worksheet, values, value_input_option)
+            response = None
+        with CACHE.lock:
+            snapshot = CACHE.cached(self.title)
+            if snapshot is not None:
+                snapshot.append(values)
+        return response
+
+    def append_with_id(self, values):
+        """Add a row with a new unique ID in column A, allocated by the
+        backend. The row is written straight away, also inside a
+        batch.Batch block, because the ID is only known afterwards.
+
+        Args:
+            values list: Cell values from column A. The first is replaced.
+        Returns:
+            tuple: The ID as a string and the 1-based row number.
+        """
+        id_, row = self.backend.append_with_id(self.title, values)
+        with CACHE.lock:
+            snapshot = CACHE.cached(self.title)
+            if snapshot is not None:
+                if row == len(snapshot.values) + 1:
+                    snapshot.append([id_, *values[1:]])
+                else:
+                    # Another writer has added rows since the last read.
+                    CACHE.invalidate(self.title)
+        return id_, row
+
+    def increment(self, row, deltas):
+        """Add numbers to cells of a row in the worksheet, then put the
+        row as stored into the snapshot. Inside a batch.Batch block the
+        increment is queued instead, and the deltas are added to the
+        snapshot's row. The snapshot's row goes with the increment, for
+        a backend that checks the cells have not changed since.
+
+        Args:
+            row int: The 1-based row number.
+            deltas dict: Column letter to the number to add, e.g. {"E": 8}.
+        Returns:
+            list: The row's values after the change.
+        Raises:
+            backends.WriteConflict: If the row keeps changing.
+        """
+        with CACHE.lock:
+            values = list(self.snapshot().values[row - 1])
+        pending = batch.current()
+        if pending is None:
+            values = self.backend.increment(self.title, row, deltas,
+                                            list(values))
+        else:
+            pending.add_increment(self.title, row, deltas, list(values))
+            for col, delta in deltas.items():
+                index = ord(col) - 65
+                values[index] = str(int(float(values[index])) + delta)
+        with CACHE.lock:
+            snapshot = CACHE.cached(self.title)
+            if snapshot is not None:
+                snapshot.update(f"A{row}", [values])
+        return values
+
+    def update(self, range_name, values=None, raw=True, key=None):
+        """Set values in a cell range of the worksheet and the snapshot.
+        Inside a batch.Batch block the update is queued instead.
+        With a key, it goes to the backend as a batch update, which
+        writes to the row that holds the key by then. The snapshot is
+        patched at the range as given.
+
+        Args:
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values, or a single value.
+            raw bool: True to store the values as-is.
+            key list: The key of the range's row, see backends.KEY_COLS.
+        """
+        pending = batch.current()
+        if pending is None and key is None:
+            response = self.worksheet.update(range_name, values, raw=raw)
+        else:
+            with batch.Batch(self.backend) as pending:
+                pending.add_update(self.title, range_name, values, raw, key)
+            response = None
+        with CACHE.lock:
+            snapshot = CACHE.cached(self.title)
+            if snapshot is not None:
+                snapshot.update(range_name, values)
+        return response
+
+
+def worksheet(name):
+    """Return CachedWorksheet: the named worksheet of the active backend.
+
+    Args:
+        name str: The worksheet title.
+    """
+    backend = backends.get_backend()
+    return CachedWorksheet(backend.worksheet(name), backend)
@@ -2,13 +2,223 @@
 
 This module provides functions to add and update
 clock in/out time in the worksheet.
+The clockings are not downloaded as a whole. Rows are appended in date
+order, so a map of each date to the rows that hold it is kept, and only
+the A1 range spanning the requested dates is read. The map is kept in a
+local file between runs, so a new terminal only reads the rows added
+since. Dates before the
+first live row are looked up in the yearly partitions, e.g. clockings_2025,
+that the archive module moves closed payroll months to. The rows last read
+for each date are kept, so a session can be served while offline.
 """
 
+# Built-in Modules
+from functools import lru_cache
+import json
+import os
+import threading
+import time
+
 # Custom Package
-from worktime.worksheets import auth
+from worktime import config
+from worktime.worksheets import backends, clocklog, journal
 from worktime.app import utility
 
 
+class DateRanges:
+    """Represent the map of dates to the rows of a clockings worksheet
+    that hold them. It is taken from config.DATES_PATH, or built from the
+    date column, and then extended from the end of the column with the
+    rows added since. The last row mapped is read again with them: if it
+    no longer holds the same employee ID and date, the archive has
+    deleted rows above it, and the column is mapped again.
+
+    Args:
+        title str: The clockings worksheet or one of its partitions.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self.lock = threading.Lock()
+        # Date: [first row, last row], 1-based.
+        self.ranges = {}
+        self.last_row = 1
+        # The employee ID and date of the last row mapped.
+        self.anchor = None
+        self.checked_at = None
+        # Date: the (row, values) tuples last read for it.
+        self.read = {}
+        self.load()
+
+    def load(self):
+        """Take the map a terminal last kept in the local file, if any.
+        The first refresh checks it still fits the worksheet.
+        """
+        try:
+            with open(config.DATES_PATH, encoding="utf-8") as dates_file:
+                saved = json.load(dates_file)[self.title]
+            self.ranges = saved["ranges"]
+            self.last_row = saved["last_row"]
+            self.anchor = saved["anchor"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.clear()
+
+    def save(self):
+        """Keep the map in the local file, next to the other worksheets'
+        maps, replacing the file in one step. The caller holds the lock.
+        """
+        try:
+            with open(config.DATES_PATH, encoding="utf-8") as dates_file:
+                saved = json.load(dates_file)
+        except (OSError, ValueError):
+            saved = {}
+        saved[self.title] = {"ranges": self.ranges,
+                             "last_row": self.last_row,
+                             "anchor": self.anchor}
+        temp_path = f"{config.DATES_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as dates_file:
+            json.dump(saved, dates_file)
+        os.replace(temp_path, config.DATES_PATH)
+
+    def refresh(self, worksheet):
+        """Read the dates of the rows added since the last check, unless
+        it was less than config.CACHE_TTL seconds ago.
+
+        Args:
+            worksheet object: The backend's clockings worksheet.
+        """
+        with self.lock:
+            if (self.checked_at is not None and
+                    time.monotonic() - self.checked_at < config.CACHE_TTL):
+                return
+            mapped = (self.last_row, self.anchor)
+            if self.last_row > 1:
+                values = worksheet.get(f"A{self.last_row}:B")
+                if values and get_anchor(values[0]) == self.anchor:
+                    self.add(values[1:])
+                else:
+                    self.clear()
+            if self.last_row == 1:
+                self.add(worksheet.get("A2:B"))
+            if (self.last_row, self.anchor) != mapped:
+                self.save()
+            self.checked_at = time.monotonic()
+
+    def add(self, values):
+        """Map the rows after the last one mapped. The caller holds the
+        lock.
+
+        Args:
+            values list: The rows' employee IDs and dates.
+        """
+        for row, cells in enumerate(values, start=self.last_row + 1):
+            if len(cells) < 2 or not cells[1]:
+                continue
+            span = self.ranges.get(cells[1])
+            if span is None:
+                self.ranges[cells[1]] = [row, row]
+            else:
+                span[1] = row
+        if values:
+            self.last_row += len(values)
+            self.anchor = get_anchor(values[-1])
+
+    def clear(self):
+        """Forget the rows mapped. The caller holds the lock."""
+        self.ranges = {}
+        self.last_row = 1
+        self.anchor = None
+
+    def expire(self):
+        """Check for new rows on the next refresh, e.g. after appending."""
+        with self.lock:
+            self.checked_at = None
+
+    def reset(self):
+        """Forget the map, e.g. after rows have been archived."""
+        with self.lock:
+            self.clear()
+            self.checked_at = None
+
+    def remember(self, dates, rows):
+        """Keep the rows read for some dates.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+            rows list: (row number, row's values) tuples read for them.
+        """
+        with self.lock:
+            for date_ in dates:
+                self.read[date_] = [found for found in rows
+                                    if found[1][1] == date_]
+
+    def recall(self, dates):
+        """Return list: the rows last read for some dates, in date order.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+        """
+        with self.lock:
+            return [found for date_ in dict.fromkeys(dates)
+                    for found in self.read.get(date_, [])]
+
+    def first_date(self):
+        """Return str: the date of the first row, None if there are none."""
+        with self.lock:
+            return next(iter(self.ranges), None)
+
+    def holds(self, dates, first, values):
+        """Check that the first and last rows mapped to some dates still
+        hold them. They may not once the archive has deleted rows, until
+        the next refresh maps the column again.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+            first int: The 1-based row of the first values.
+            values list: The rows' values read from there.
+        """
+        with self.lock:
+            rows = [(row, date_) for date_ in dates
+                    for row in self.ranges.get(date_, ())]
+        # Rows mapped since the read are left to the next one.
+        return all(values[row - first][1] == date_ for row, date_ in rows
+                   if row - first < len(values))
+
+    def span(self, dates):
+        """Return the rows to read for some dates.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+        Returns:
+            tuple: The first and last 1-based row, None if no rows.
+        """
+        with self.lock:
+            spans = [self.ranges[date_] for date_ in dates
+                     if date_ in self.ranges]
+        if spans:
+            return (min(first for first, _ in spans),
+                    max(last for _, last in spans))
+
+
+def get_anchor(cells):
+    """Return list: the employee ID and date of a row, blank if missing.
+
+    Args:
+        cells list: The row's first cells, as read.
+    """
+    return (list(cells) + ["", ""])[:2]
+
+
+@lru_cache(maxsize=None)
+def get_ranges(title):
+    """Return DateRanges: the process's map of dates to rows.
+
+    Args:
+        title str: The clockings worksheet or one of its partitions.
+    """
+    return DateRanges(title)
+
+
 class Clockings:
     """Represent the clockings worksheet:
         Column A: employee_id
@@ -18,24 +228,99 @@ class Clockings:
 
     Args:
         ee_id str: An employee ID
+        year int: The year of the partition to read. The live one if None.
     """
 
-    today = utility.GetDatetime().tday_str()
-
-    def __init__(self, ee_id=None):
+    def __init__(self, ee_id=None, year=None):
         self.ee_id = ee_id
-        self.worksheet = auth.SHEET.worksheet("clockings")
-        self.clockings = self.worksheet.get_all_values()[1:]
+        self.worksheet = backends.get_backend().worksheet(
+            "clockings" if year is None
+            else backends.partition_name("clockings", year))
         self.clock_in_col = "C"
         self.clock_out_col = "D"
 
+    def get_rows(self, dates, archived=False, stale=False):
+        """Read the clockings on some dates, fetching only the rows from
+        the first to the last row those dates span.
+
+        Args:
+            dates list: DD/MM/YYYY format dates.
+            archived bool: True to look up the dates before the first
+                           live row in the yearly partitions as well.
+            stale bool: True to take the rows last read for the dates if
+                        the worksheet cannot be read right now. Writers
+                        must not, as rows may be missing.
+        Returns:
+            list: (1-based row number, row's values) tuples, archived rows
+                  first with None as their row number, then in row order.
+        """
+        ranges = get_ranges(self.worksheet.title)
+        try:
+            rows = self.read_rows(ranges, dates, archived)
+        except Exception as error:
+            if not stale or not journal.is_unreachable(error):
+                raise
+            return ranges.recall(dates)
+        ranges.remember(dates, rows)
+        return rows
+
+    def read_rows(self, ranges, dates, archived):
+        """Read the clockings on some dates. See get_rows.
+
+        Args:
+            ranges DateRanges: The worksheet's map of dates to rows.
+            dates list: DD/MM/YYYY format dates.
+            archived bool: True to look in the yearly partitions as well.
+        """
+        ranges.refresh(self.worksheet)
+        rows = []
+        if archived:
+            first_date = ranges.first_date()
+            first = first_date and utility.to_ordinal(first_date)
+            years = {}
+            for date_ in dates:
+                if first is None or utility.to_ordinal(date_) < first:
+                    years.setdefault(utility.convert_date(date_).year,
+                                     []).append(date_)
+            backend = backends.get_backend()
+            for year, year_dates in sorted(years.items()):
+                if backend.has_worksheet(
+                        backends.partition_name("clockings", year)):
+                    rows.extend((None, values) for _, values
+                                in Clockings(year=year).get_rows(year_dates))
+        span = ranges.span(dates)
+        if span is None:
+            return rows
+        first, last = span
+        wanted = set(dates)
+        # Trailing blank cells and rows are left out of the response.
+        values = [tuple(cells) + ("",) * (4 - len(cells)) for cells
+                  in self.worksheet.get(f"A{first}:D{last}")]
+        values.extend([("",) * 4] * (last - first + 1 - len(values)))
+        if not ranges.holds(dates, first, values):
+            # Another terminal has archived the rows: map them again.
+            ranges.reset()
+            return self.read_rows(ranges, dates, archived)
+        rows.extend((row, cells) for row, cells
+                    in enumerate(values, start=first) if cells[1] in wanted)
+        return rows
+
+    @property
+    def today(self):
+        """str: Today's DD/MM/YYYY date, read from the clock on each use."""
+        return utility.GetDatetime().tday_str()
+
     def add_clocking(self, data):
-        """Add clocking data to the worksheet.
+        """Log new clocking data. The clock event log adds it to the
+        worksheet with the next compaction.
 
         Args:
             data list: Contains Employee ID, Date, Clock in, Clock out
         """
-        self.worksheet.append_row(data)
+        ee_id, date_, *times = data
+        for field, time_ in zip(clocklog.FIELDS, times):
+            if time_:
+                clocklog.get_log().record(ee_id, date_, field, time_)
 
     def update_clock_in(self, date_, time_):
         """Replace an existing clock in time with a new one.
@@ -44,8 +329,7 @@ class Clockings:
             date_ str: A DD/MM/YYYY format date.
             time_ str: A HH:MM:SS format time.
         """
-        row = self.get_one_clocking(date_)["row"]
-        self.worksheet.update(f"{self.clock_in_col}{row}", time_)
+        clocklog.get_log().record(self.ee_id, date_, "in", time_)
 
     def update_clock_out(self, date_, time_):
         """Replace an existing clock out time with a new one.
@@ -54,20 +338,40 @@ class Clockings:
             date_ str: A DD/MM/YYYY format date.
             time_ str: A HH:MM:SS format time.
         """
-        row = self.get_one_clocking(date_)["row"]
-        self.worksheet.update(f"{self.clock_out_col}{row}", time_)
+        clocklog.get_log().record(self.ee_id, date_, "out", time_)
+
+    def get_day(self, date_):
+        """Read the clockings of all employees on a date.
+
+        Args:
+            date_ str: A DD/MM/YYYY format date.
+        Returns:
+            list: Tuples of the rows' values, in row order.
+        """
+        return [values for _, values
+                in self.get_rows([date_], archived=True)]
 
     def get_one_clocking(self, target_date=None):
-        """Iterate through the sheet to find row values that match the ID and date.
+        """Look up the row values that match the ID and date, with the
+        times still waiting in the clock event log laid over them.
 
         Args:
             target_date str: A DD/MM/YYYY format date. Today if none.
         Returns:
-            dict: Clocking data with a sheet's row number.
+            dict: Clocking data with a sheet's row number, which is None
+                  if the row has not been written yet.
         """
         target_date = self.today if target_date is None else target_date
-        for row, clocking in enumerate(self.clockings, start=2):
-            ee_id, date, clock_in, clock_out = clocking
-            if ee_id == self.ee_id and date == target_date:
-                return ({"row": row, "id": ee_id, "date": date,
-                        "start_time": clock_in, "end_time": clock_out})
+        found = next((found for found in self.get_rows([target_date])
+                      if found[1][0] == self.ee_id), None)
+        pending = clocklog.get_log().pending(self.ee_id, target_date)
+        if found:
+            row, (ee_id, date, clock_in, clock_out) = found
+        elif pending:
+            row, ee_id, date, clock_in, clock_out = (
+                None, self.ee_id, target_date, "", "")
+        else:
+            return None
+        return ({"row": row, "id": ee_id, "date": date,
+                 "start_time": pending.get("in", clock_in),
+                 "end_time": pending.get("out", clock_out)})
@@ -0,0 +1,240 @@
+"""Clock Event Log Module
+
+This module records clock in/out times in a local append-only file
+before they reach the clockings worksheet. Each event is one JSON line,
+flushed and fsync-ed, so a punch is confirmed as soon as it is on disk.
+A background compactor folds the logged events into clockings rows in
+one batch every few seconds and then drops them from the log, so the
+worksheet sees a few batched writes instead of one write per punch.
+Until then, readers overlay the pending events on the worksheet rows.
+Each process keeps its own log file, and takes over the logs of
+processes that ended before compacting theirs.
+"""
+
+# Built-in Modules
+import atexit
+from functools import lru_cache
+import json
+import os
+import threading
+
+# Custom Packages
+from worktime import config
+from worktime.worksheets import (backends, batch, cache, clockings,
+                                 logfiles, scheduler)
+
+# Event field: the clockings worksheet column it sets.
+FIELDS = {"in": "C", "out": "D"}
+
+
+def parse(lines):
+    """Return list: the events of log file lines, oldest first.
+    A line cut short by a crash is skipped.
+
+    Args:
+        lines list: The lines of a log file.
+    """
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue
+    return events
+
+
+class ClockLog:
+    """Represent the local log of clock events not yet in the worksheet.
+    The process's own file is the path plus its process ID, locked while
+    the process runs.
+
+    Args:
+        path str: The configured log file path.
+    """
+
+    def __init__(self, path):
+        self.base_path = path
+        self.path = logfiles.own_path(path)
+        self.lock = threading.RLock()
+        # Only one compaction at a time; punches are not held up by it.
+        self.compact_lock = threading.Lock()
+        self.file = logfiles.lock(self.path)
+        self.events = self.read()
+        self.adopt()
+
+    def read(self):
+        """Return list: the events in the process's log file, oldest
+        first. It has some if an ended process had the same ID.
+        """
+        with open(self.path, encoding="utf-8") as log_file:
+            return parse(log_file)
+
+    def write_events(self, events):
+        """Write events to disk and keep them as pending.
+
+        Args:
+            events list: Event dicts.
+        """
+        with self.lock:
+            for event in events:
+                self.file.write(json.dumps(event) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.events.extend(events)
+
+    def adopt(self):
+        """Take over the events of logs whose processes have ended, e.g.
+        a terminal closed before its last compaction.
+        """
+        logfiles.take_over(self.base_path,
+                           lambda lines: self.write_events(parse(lines)))
+
+    def record(self, ee_id, date_, field, time_):
+        """Write a clock event to disk and keep it as pending.
+
+        Args:
+            ee_id str: An employee ID.
+            date_ str: A DD/MM/YYYY format date.
+            field str: in or out.
+            time_ str: A HH:MM:SS format time.
+        """
+        self.write_events([{"id": ee_id, "date": date_, "field": field,
+                            "time": time_}])
+
+    def pending(self, ee_id, date_):
+        """Return dict: in/out times logged for the ID and date but not
+        yet written to the worksheet, the latest one of each.
+
+        Args:
+            ee_id str: An employee ID.
+            date_ str: A DD/MM/YYYY format date.
+        """
+        with self.lock:
+            return {event["field"]: event["time"] for event in self.events
+                    if event["id"] == ee_id and event["date"] == date_}
+
+    def compact(self):
+        """Fold the pending events into the clockings worksheet in one
+        batch and drop them from the log. Events logged meanwhile stay.
+        Replaying events after a failed or interrupted compaction sets the
+        same cells again, so nothing is counted twice. The updates carry
+        each row's employee ID and date, so they find the row even if the
+        archive has moved it by the time they are sent.
+
+        Returns:
+            int: The number of events written to the worksheet.
+        """
+        with self.compact_lock:
+            self.adopt()
+            with self.lock:
+                events = list(self.events)
+            if not events:
+                return 0
+            rows = {}
+            for event in events:
+                key = (event["id"], event["date"])
+                rows.setdefault(key, {})[event["field"]] = event["time"]
+
+            worksheet = cache.worksheet("clockings")
+            # (ID, date): the first worksheet row with them.
+            stored = {}
+            dates = list({date_ for _, date_ in rows})
+            # Look for rows other terminals have appended since the last
+            # check; only the rows after those already mapped are read.
+            clockings.get_ranges("clockings").expire()
+            for row, values in clockings.Clockings().get_rows(dates):
+                stored.setdefault(tuple(values[:2]), row)
+            with batch.Batch():
+                for (ee_id, date_), fields in rows.items():
+                    row = stored.get((ee_id, date_))
+                    if row is None:
+                        worksheet.append_row([ee_id, date_,
+                                              fields.get("in", ""),
+                                              fields.get("out", "")])
+                        continue
+                    for field, time_ in fields.items():
+                        worksheet.update(f"{FIELDS[field]}{row}", time_,
+                                         key=[ee_id, date_])
+            clockings.get_ranges("clockings").expire()
+            if backends.get_backend().journal.pending("clockings"):
+                # Keep the events until the journal has sent the writes:
+                # readers overlay them meanwhile. The next compaction
+                # cannot read the worksheet before then, and afterwards
+                # it finds the rows and sets the same cells again.
+                return 0
+            self.truncate(len(events))
+            return len(events)
+
+    def truncate(self, count):
+        """Drop the oldest events from the log, re-read from the locked
+        file, and rewrite it in one step so a crash leaves either the old
+        or the new log.
+
+        Args:
+            count int: The number of events to drop.
+        """
+        with self.lock:
+            self.events = self.read()[count:]
+            new_file = logfiles.rewrite(
+                self.path, [json.dumps(event) for event in self.events])
+            self.file.close()
+            self.file = new_file
+
+
+class Compactor(threading.Thread):
+    """Represent the background thread that compacts the log.
+    A failed compaction leaves the events in the log for the next one.
+
+    Args:
+        log ClockLog: The log to compact.
+        interval float: Seconds between compactions.
+    """
+
+    def __init__(self, log, interval):
+        super().__init__(name="clock-log-compactor", daemon=True)
+        self.log = log
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with scheduler.background():
+                    self.log.compact()
+            except Exception:  # Retried on the next interval.
+                continue
+
+    def stop(self):
+        """Stop the thread and compact what is left. If that fails, the
+        events stay in the log for the next run.
+        """
+        self.stopped.set()
+        try:
+            self.log.compact()
+        except Exception:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_log():
+    """Return ClockLog: the process's clock event log, opened once."""
+    return ClockLog(config.CLOCK_LOG_PATH)
+
+
+@lru_cache(maxsize=None)
+def start_compactor():
+    """Compact events left from the last run, then start the background
+    compactor. The log is compacted once more when the process exits.
+
+    Returns:
+        Compactor: The started thread.
+    """
+    log = get_log()
+    try:
+        log.compact()
+    except Exception:  # The compactor retries in the background.
+        pass
+    compactor = Compactor(log, config.CLOCK_COMPACT_INTERVAL)
+    compactor.start()
+    atexit.register(compactor.stop)
+    return compactor
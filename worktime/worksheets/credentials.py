@@ -5,7 +5,7 @@ from the worksheet.
 """
 
 # Custom Package
-from worktime.worksheets import auth
+from worktime.worksheets import cache
 
 
 class Credentials:
@@ -15,10 +15,33 @@ class Credentials:
     """
 
     def __init__(self):
-        self.worksheet = auth.SHEET.worksheet("login_credentials")
+        self.worksheet = cache.worksheet("login_credentials")
         self.credentials = self.worksheet.get_all_values()[1:]
+        self.password_col = "B"
+        # Employee ID: password hash, built once for the login prompt.
+        self.hashes = {}
+        for id_, password in self.credentials:
+            self.hashes.setdefault(id_, password)
 
     def ids(self):
         """Returns a list of employee IDs."""
-        ids = [id for id, pw in self.credentials]
-        return ids
+        return list(self.hashes)
+
+    def get_password(self, id_):
+        """Returns the password hash for the ID, or None if unknown.
+
+        Args:
+            id_ str: An employee ID.
+        """
+        return self.hashes.get(id_)
+
+    def update_password(self, id_, password):
+        """Replace the ID's password hash.
+
+        Args:
+            id_ str: An employee ID.
+            password str: The new password hash.
+        """
+        row, _ = self.worksheet.find((0,), (id_,))
+        self.worksheet.update(f"{self.password_col}{row}", password)
+        self.hashes[id_] = password
@@ -5,7 +5,7 @@ first name and last name.
 """
 
 # Custom Package
-from worktime.worksheets import auth
+from worktime.worksheets import cache
 
 
 class Employees:
@@ -20,12 +20,35 @@ class Employees:
 
     def __init__(self, id_=None):
         self.id_ = id_
-        self.worksheet = auth.SHEET.worksheet("employees")
+        self.worksheet = cache.worksheet("employees")
         self.employees = self.worksheet.get_all_values()[1:]
 
     def get_fname(self):
         """Returns the employee's first name."""
-        for employee in self.employees:
-            if employee[0] == self.id_:
-                fname = employee[1]
+        _, (_, fname, _) = self.worksheet.find((0,), (self.id_,))
         return fname
+
+    def get_fullname(self, id_=None):
+        """Returns an employee's full name, or None if the ID is unknown.
+
+        Args:
+            id_ str: An employee ID. The instance's ID if None.
+        """
+        id_ = self.id_ if id_ is None else id_
+        found = self.worksheet.find((0,), (id_,))
+        if found:
+            _, (_, fname, lname) = found
+            return f"{fname} {lname}"
+
+    def with_names(self, rows, col=0):
+        """Join rows to the employees' names without changing them.
+
+        Args:
+            rows list: Worksheet rows with an employee ID.
+            col int: The 0-based index of the employee ID column.
+        Returns:
+            list: Tuples of the rows' values with the ID replaced by the
+                  full name, or kept if the ID is unknown.
+        """
+        return [(*row[:col], self.get_fullname(row[col]) or row[col],
+                 *row[col + 1:]) for row in rows]
@@ -5,7 +5,10 @@ absence entitlements in the worksheet.
 """
 
 # Custom Package
-from worktime.worksheets import auth
+from worktime.worksheets import cache
+
+# Worksheet column of each entitlement bucket.
+COLUMNS = {"taken": "C", "planned": "D", "pending": "E", "unallocated": "F"}
 
 
 class Entitlements:
@@ -23,97 +26,37 @@ class Entitlements:
 
     def __init__(self, id_=None):
         self.id_ = id_
-        self.worksheet = auth.SHEET.worksheet("entitlements")
+        self.worksheet = cache.worksheet("entitlements")
         self.entitlements = self.worksheet.get_all_values()[1:]
 
     def get_entitlements(self):
         """Retrieve an employee's entitlements in a list."""
-        for entitlement in self.entitlements:
-            if self.id_ == entitlement[0]:
-                return entitlement[1:]
+        found = self.worksheet.find((0,), (self.id_,))
+        if found:
+            return found[1][1:]
 
     def get_row(self):
         """Return the worksheet row index which is 1-based."""
-        for row, entitlement in enumerate(self.entitlements):
-            if self.id_ == entitlement[0]:
-                return row + 2
-
-    def get_hours(self, code):
-        """Return the current value of target cell.
-
-        Args:
-            code str: Absence status - taken, planned, pending or unallocated.
-        """
-        row = self.get_row() - 2
-        # ord() returns unicode code number. i.e. A = 65.
-        # To get the 0-based index, it needs to be abstracted by 65.
-        col = ord(self.get_col(code)) - 65
-        current_hours = self.entitlements[row][col]
-        return int(current_hours)
+        found = self.worksheet.find((0,), (self.id_,))
+        if found:
+            return found[0]
 
-    def update_hours(self, hours, direction):
-        """Add and subtract the value of hours to / from the cell
-        depending on the value of argument "direction".
+    def move(self, hours, from_bucket, to_bucket):
+        """Transfer hours from one bucket to another, e.g. from
+        unallocated to pending. Only the two cells are written, as an
+        increment the storage backend adds to the stored values, so a
+        concurrent change to the same row is kept. Google Sheets, which
+        cannot add in place, checks the cells before writing instead.
 
         Args:
             hours int: The operand - requested absence hours.
-            direction str: Cell names
+            from_bucket str: Taken, planned, pending or unallocated.
+            to_bucket str: Taken, planned, pending or unallocated.
+        Returns:
+            list: The employee's entitlements after the transfer.
         """
         row = self.get_row()
-        taken_col = self.get_col("taken")
-        planned_col = self.get_col("planned")
-        pending_col = self.get_col("pending")
-        unallocated_col = self.get_col("unallocated")
-        if direction == "unallocated_to_pending":
-            pending_hours = self.get_hours("pending") + hours
-            unallocated_hours = self.get_hours("unallocated") - hours
-            self.worksheet.update(f"{pending_col}{row}:{unallocated_col}{row}",
-                                  [[pending_hours, unallocated_hours]])
-        elif direction == "pending_to_unallocated":
-            pending_hours = self.get_hours("pending") - hours
-            unallocated_hours = self.get_hours("unallocated") + hours
-            self.worksheet.update(f"{pending_col}{row}:{unallocated_col}{row}",
-                                  [[pending_hours, unallocated_hours]])
-        elif direction == "pending_to_planned":
-            pending_hours = self.get_hours("pending") - hours
-            planned_hours = self.get_hours("planned") + hours
-            self.worksheet.update(f"{planned_col}{row}:{pending_col}{row}",
-                                  [[planned_hours, pending_hours]])
-        elif direction == "unallocated_to_planned":
-            pending_hours = self.get_hours("pending")
-            planned_hours = self.get_hours("planned") + hours
-            unallocated_hours = self.get_hours("unallocated") - hours
-            self.worksheet.update(f"{planned_col}{row}:{unallocated_col}{row}",
-                                  [[planned_hours, pending_hours,
-                                   unallocated_hours]])
-        elif direction == "planned_to_unallocated":
-            pending_hours = self.get_hours("pending")
-            planned_hours = self.get_hours("planned") - hours
-            unallocated_hours = self.get_hours("unallocated") + hours
-            self.worksheet.update(f"{planned_col}{row}:{unallocated_col}{row}",
-                                  [[planned_hours, pending_hours,
-                                   unallocated_hours]])
-        elif direction == "unallocated_to_taken":
-            taken_hours = self.get_hours("taken") + hours
-            planned_hours = self.get_hours("planned")
-            pending_hours = self.get_hours("pending")
-            unallocated_hours = self.get_hours("unallocated") - hours
-            self.worksheet.update(f"{taken_col}{row}:{unallocated_col}{row}",
-                                  [[taken_hours, planned_hours,
-                                   pending_hours, unallocated_hours]])
-
-    def get_col(self, code):
-        """Return the worksheet column index.
-
-        Args:
-            code str: Absence status - taken, planned, pending or unallocated.
-        """
-        if code == "taken":
-            col = "C"
-        elif code == "planned":
-            col = "D"
-        elif code == "pending":
-            col = "E"
-        else:
-            col = "F"
-        return col
+        # Half days come as float hours, e.g. 4.0; the cells hold integers.
+        hours = int(hours)
+        deltas = {COLUMNS[from_bucket]: -hours, COLUMNS[to_bucket]: hours}
+        return self.worksheet.increment(row, deltas)[1:]
@@ -0,0 +1,453 @@
+"""Write-Ahead Journal Module
+
+This module keeps worksheet writes safe while the storage backend cannot
+be reached. Each write is first appended to a local journal file and
+fsync-ed, which commits it, and the cached snapshot is patched as usual.
+The journal then replays the writes to the backend in order. If the
+backend is unreachable, a background replayer retries with exponential
+backoff, so the app carries on with the local copy instead of crashing.
+Each write carries an idempotency key, so a write that reached the
+backend before a crash is not applied twice when it is replayed.
+Each process keeps its own journal file, and takes over the journals of
+processes that ended before replaying theirs.
+"""
+
+# Built-in Modules
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+# Third-party Packages
+from google.auth.exceptions import TransportError
+from gspread.exceptions import APIError
+import requests
+
+# Custom Packages
+from worktime.worksheets import logfiles, scheduler
+
+# Seconds the replayer waits after the first failure, and at most.
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+
+
+class Unreachable(Exception):
+    """Raised when the backend cannot serve a request right now."""
+
+
+def is_unreachable(error):
+    """Check if an error means the backend could not be reached or was
+    too busy, so the same request may succeed later.
+
+    Args:
+        error Exception: The error a backend call raised.
+    Returns:
+        bool: True for network errors, time-outs, quota (429) and server
+              (5xx) errors and a locked SQLite database.
+    """
+    if isinstance(error, APIError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    if isinstance(error, sqlite3.OperationalError):
+        # Other operational errors, e.g. "no such table", are bugs.
+        message = str(error)
+        return "locked" in message or "busy" in message
+    return isinstance(error, (Unreachable, TransportError,
+                              requests.exceptions.ConnectionError,
+                              requests.exceptions.Timeout))
+
+
+def parse(lines):
+    """Return list: the writes of journal file lines, oldest first.
+    Writes that may have been sent before a crash are flagged "sent".
+
+    Args:
+        lines list: The lines of a journal file.
+    """
+    ops, sent = [], set()
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:  # Cut short by a crash.
+            continue
+        if "op" in entry:
+            ops.append(entry)
+        else:
+            sent.add(entry["sent"])
+    for op in ops:
+        op["sent"] = op["sent"] or op["key"] in sent
+    return ops
+
+
+class Journal:
+    """Represent the local file of writes not yet applied to the backend.
+    The process's own file is the path plus its process ID, locked while
+    the process runs.
+
+    Args:
+        path str: The configured journal file path.
+        backend Backend: The backend the writes are replayed to.
+    """
+
+    def __init__(self, path, backend):
+        self.base_path = path
+        self.path = logfiles.own_path(path)
+        self.backend = backend
+        self.lock = threading.RLock()
+        self.replay_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.replayer = None
+        self.backoff = MIN_BACKOFF
+        # Writes the backend rejected for good, with the error.
+        self.failed = []
+        self.file = logfiles.lock(self.path)
+        with open(self.path, encoding="utf-8") as journal_file:
+            # Some are left if an ended process had the same ID.
+            self.ops = parse(journal_file)
+        logfiles.take_over(path, self.adopt)
+
+    def adopt(self, lines):
+        """Take over the writes of an ended process's journal. They are
+        committed to this process's journal before its file is removed.
+
+        Args:
+            lines list: The lines of the ended process's journal file.
+        """
+        with self.lock:
+            for op in parse(lines):
+                self.write_line(op)
+                self.ops.append(op)
+
+    def write_line(self, entry):
+        """Append a JSON line to the journal file and fsync it.
+
+        Args:
+            entry dict: A write or a sent marker.
+        """
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def rewrite(self):
+        """Replace the journal file with the writes still pending."""
+        new_file = logfiles.rewrite(self.path,
+                                    [json.dumps(op) for op in self.ops])
+        self.file.close()
+        self.file = new_file
+
+    def submit(self, op):
+        """Commit a write to the journal, then try to replay it.
+
+        Args:
+            op dict: The write, e.g. {"op": "update", "title": ...}.
+        Raises:
+            Exception: The backend's error if it rejects the write for
+                       a reason other than being unreachable.
+        """
+        op = {**op, "key": uuid.uuid4().hex, "sent": False}
+        with self.lock:
+            self.write_line(op)
+            self.ops.append(op)
+        self.replay(raise_for=op["key"])
+
+    def pending(self, title=None):
+        """Return bool: True if writes are waiting to be replayed.
+
+        Args:
+            title str: Only count writes to this worksheet if given.
+        """
+        with self.lock:
+            return any(title is None or title in op_titles(op)
+                       for op in self.ops)
+
+    def replay(self, raise_for=None):
+        """Apply the pending writes to the backend in order. Stop at the
+        first one the backend cannot take now and leave the rest to the
+        background replayer. Writes rejected for good are dropped.
+
+        Args:
+            raise_for str: Re-raise the error if the write with this
+                           idempotency key is rejected.
+        Returns:
+            bool: True if no writes are pending any more.
+        """
+        with self.replay_lock:
+            while True:
+                with self.lock:
+                    if not self.ops:
+                        self.backoff = MIN_BACKOFF
+                        return True
+                    op = self.ops[0]
+                try:
+                    self.apply(op)
+                except Exception as error:
+                    if is_unreachable(error):
+                        self.schedule()
+                        return False
+                    with self.lock:
+                        self.ops.pop(0)
+                        self.failed.append((op, error))
+                        self.rewrite()
+                    if op["key"] == raise_for:
+                        raise
+                    continue
+                with self.lock:
+                    self.ops.pop(0)
+                    self.rewrite()
+
+    def apply(self, op):
+        """Send one write to the backend, at most once.
+        A backend with run_once (SQLite) records the idempotency key in
+        the same transaction as the write. For others, rows of an append
+        that may already have been sent are looked for before sending.
+
+        Args:
+            op dict: The write.
+        """
+        run_once = getattr(self.backend, "run_once", None)
+        if run_once is not None:
+            run_once(op["key"], lambda: self.send(op))
+            return
+        if not op["sent"]:
+            with self.lock:
+                self.write_line({"sent": op["key"]})
+                op["sent"] = True
+        elif op["op"] == "append_rows":
+            op = {**op, "values": self.unsent_rows(op)}
+            if not op["values"]:
+                return
+        self.send(op)
+
+    def unsent_rows(self, op):
+        """Return list: the rows of an append not found at the end of
+        the worksheet, i.e. those the last attempt did not add.
+
+        Args:
+            op dict: An append_rows write.
+        """
+        rows = [[str(value) for value in row] for row in op["values"]]
+        tail = self.backend.worksheet(op["title"]).get_all_values()
+        for count in range(len(rows), 0, -1):
+            if [row[:len(rows[0])] for row in tail[-count:]] == rows[:count]:
+                return rows[count:]
+        return rows
+
+    def send(self, op):
+        """Call the backend method that makes the write.
+
+        Args:
+            op dict: The write.
+        """
+        if op["op"] == "batch_update":
+            # Updates journaled before keys were added have none.
+            self.backend.batch_update(
+                [(*update, None)[:5] for update in op["updates"]])
+            return
+        worksheet = self.backend.worksheet(op["title"])
+        if op["op"] == "update":
+            worksheet.update(op["range"], op["values"], raw=op["raw"])
+        else:
+            worksheet.append_rows(op["values"],
+                                  value_input_option=op["input"])
+
+    def schedule(self):
+        """Start the background replayer, or wake it up."""
+        with self.lock:
+            if self.replayer is None or not self.replayer.is_alive():
+                self.replayer = threading.Thread(
+                    target=self.run_replayer, name="journal-replayer",
+                    daemon=True)
+                self.replayer.start()
+            else:
+                self.wake.set()
+
+    def run_replayer(self):
+        """Replay the journal until it is empty, waiting longer after
+        each failed attempt, up to MAX_BACKOFF seconds.
+        """
+        while True:
+            self.wake.wait(self.backoff)
+            self.wake.clear()
+            with scheduler.background():
+                replayed = self.replay()
+            if replayed:
+                return
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+
+
+def op_titles(op):
+    """Return set: the worksheet titles a write touches.
+
+    Args:
+        op dict: The write.
+    """
+    if op["op"] == "batch_update":
+        return {update[0] for update in op["updates"]}
+    return {op["title"]}
+
+
+class JournaledBackend:
+    """Represent a backend whose writes go through a Journal.
+    Calls that need the backend's answer straight away - append_with_id,
+    increment, a batch update with increments - and the archival calls
+    add_worksheet and delete_rows are passed on and raise if it cannot
+    be reached.
+
+    Args:
+        backend Backend: The backend to replay the writes to.
+        path str: The configured journal file path.
+    """
+
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.journal = Journal(path, backend)
+        if self.journal.ops:
+            # Writes left from the last run.
+            self.journal.schedule()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def replayed(self):
+        """Replay the journal before a call that cannot be journaled, so
+        it does not overtake earlier writes.
+
+        Raises:
+            Unreachable: If writes are still pending.
+        """
+        if not self.journal.replay():
+            raise Unreachable("The storage backend cannot be reached.")
+
+    def append_with_id(self, title, values):
+        """Pass the call on once the journal is replayed.
+        See Backend.append_with_id.
+        """
+        self.replayed()
+        return self.backend.append_with_id(title, values)
+
+    def increment(self, title, row, deltas, expected=None):
+        """Pass the call on once the journal is replayed.
+        See Backend.increment.
+        """
+        self.replayed()
+        return self.backend.increment(title, row, deltas, expected)
+
+    def add_worksheet(self, name):
+        """Pass the call on once the journal is replayed.
+        See Backend.add_worksheet.
+        """
+        self.replayed()
+        self.backend.add_worksheet(name)
+
+    def delete_rows(self, title, rows):
+        """Pass the call on once the journal is replayed.
+        See Backend.delete_rows.
+        """
+        self.replayed()
+        self.backend.delete_rows(title, rows)
+
+    def worksheet(self, name):
+        """Return JournaledWorksheet: the backend's worksheet.
+
+        Args:
+            name str: The worksheet title.
+        """
+        return JournaledWorksheet(self.journal,
+                                  self.backend.worksheet(name))
+
+    def batch_update(self, updates, increments=()):
+        """Journal several cell range updates as one write. Their keys
+        are journaled with them, so a replayed update still finds its
+        row. With increments, which cannot be journaled, they are passed
+        on together once the journal is replayed.
+
+        Args:
+            updates list: Tuples of worksheet title, A1 range,
+                          a list of lists of values, the raw flag and
+                          the key of the range's row or None.
+            increments list: Tuples of worksheet title, 1-based row,
+                             deltas and the row's values as last read.
+        """
+        if increments:
+            self.replayed()
+            self.backend.batch_update(updates, increments)
+            return
+        self.journal.submit({"op": "batch_update",
+                             "updates": [list(update) for update in updates]})
+
+
+class JournaledWorksheet:
+    """Represent a backend worksheet whose writes go through a Journal.
+
+    Args:
+        journal Journal: The journal to commit the writes to.
+        worksheet object: The backend worksheet.
+    """
+
+    def __init__(self, journal, worksheet):
+        self.journal = journal
+        self.worksheet = worksheet
+        self.title = worksheet.title
+
+    def __getattr__(self, name):
+        return getattr(self.worksheet, name)
+
+    def get_all_values(self):
+        """Return the backend's values, once the journaled writes to this
+        worksheet have been replayed.
+
+        Raises:
+            Unreachable: If some of them are still pending.
+        """
+        self.journal.replay()
+        if self.journal.pending(self.title):
+            raise Unreachable(f"Writes to {self.title} are still pending.")
+        return self.worksheet.get_all_values()
+
+    def get(self, range_name):
+        """Return the backend's values in a range, once the journaled
+        writes to this worksheet have been replayed.
+
+        Args:
+            range_name str: The A1 notation of the range.
+        Raises:
+            Unreachable: If some of them are still pending.
+        """
+        self.journal.replay()
+        if self.journal.pending(self.title):
+            raise Unreachable(f"Writes to {self.title} are still pending.")
+        return self.worksheet.get(range_name)
+
+    def append_row(self, values, value_input_option="RAW"):
+        """Journal a new row.
+
+        Args:
+            values list: Cell values from column A.
+            value_input_option str: How the backend interprets the values.
+        """
+        self.append_rows([values], value_input_option)
+
+    def append_rows(self, values, value_input_option="RAW"):
+        """Journal new rows.
+
+        Args:
+            values list: A list of lists of cell values from column A.
+            value_input_option str: How the backend interprets the values.
+        """
+        self.journal.submit({"op": "append_rows", "title": self.title,
+                             "values": values, "input": value_input_option})
+
+    def update(self, range_name, values=None, raw=True):
+        """Journal a cell range update.
+
+        Args:
+            range_name str: The A1 notation of the top-left cell or range.
+            values list: A list of lists of values, or a single value.
+            raw bool: True to store the values as-is.
+        """
+        if not isinstance(values, list):
+            values = [[values]]
+        self.journal.submit({"op": "update", "title": self.title,
+                             "range": range_name, "values": values,
+                             "raw": raw})
@@ -0,0 +1,125 @@
+"""Log Files Module
+
+This module gives each process its own local log file, e.g. the clock
+event log and the write-ahead journal. Every browser terminal runs its
+own process in the same directory, so a shared file would let one
+process rewrite away what another has fsync-ed.
+A process holds an exclusive fcntl.flock on its file while it runs. The
+kernel releases the lock when the process ends, also when it is killed,
+so another process can then take the file over and carry on with it.
+"""
+
+# Built-in Modules
+import fcntl
+import glob
+import os
+
+
+def own_path(path):
+    """Return str: the process's own log file, e.g. .worktime_clock.log.42.
+
+    Args:
+        path str: The configured log file path.
+    """
+    return f"{path}.{os.getpid()}"
+
+
+def lock(path, mode="a", blocking=True):
+    """Open a file and take its exclusive lock, making sure it was not
+    replaced or removed by another process meanwhile.
+
+    Args:
+        path str: The file path.
+        mode str: a to create the file if missing, r to only read it.
+        blocking bool: False to give up if another process holds it.
+    Returns:
+        file: The locked file object.
+        None: If the file is held, or it is missing in r mode.
+    """
+    while True:
+        try:
+            locked_file = open(path, mode, encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(locked_file.fileno(), fcntl.LOCK_EX |
+                        (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            locked_file.close()
+            return None
+        try:
+            same = (os.stat(path).st_ino ==
+                    os.fstat(locked_file.fileno()).st_ino)
+        except FileNotFoundError:
+            same = False
+        if same:
+            return locked_file
+        locked_file.close()
+        if mode == "r":
+            # Taken over by another process.
+            return None
+
+
+def abandoned(path):
+    """Yield the log files of processes that have ended, locked, oldest
+    process ID first. A file from before logs were kept per process, at
+    the configured path itself, counts as abandoned as well.
+
+    Args:
+        path str: The configured log file path.
+    Yields:
+        tuple: The file path and the file object, open for reading.
+    """
+    own = own_path(path)
+    candidates = sorted(
+        (int(other.rpartition(".")[2]), other)
+        for other in glob.glob(f"{glob.escape(path)}.*")
+        if other.rpartition(".")[2].isdigit() and other != own)
+    for other in [path] + [other for _, other in candidates]:
+        log_file = lock(other, "r", blocking=False)
+        if log_file is not None:
+            yield other, log_file
+
+
+def take_over(path, write_lines):
+    """Hand the lines of abandoned log files to the process's own log and
+    remove the files. They are removed only once write_lines returns, so
+    a crash in between leaves lines twice rather than losing any.
+
+    Args:
+        path str: The configured log file path.
+        write_lines function: Takes the lines and commits them.
+    Returns:
+        int: The number of files taken over.
+    """
+    count = 0
+    for other, log_file in abandoned(path):
+        with log_file:
+            lines = log_file.read().splitlines()
+            if lines:
+                write_lines(lines)
+            os.remove(other)
+        count += 1
+    return count
+
+
+def rewrite(path, lines):
+    """Replace a locked log file in one step, so a crash leaves either the
+    old or the new file. The new file is locked before it takes the old
+    one's place; the caller then closes the old one.
+
+    Args:
+        path str: The file path.
+        lines list: The new file's lines.
+    Returns:
+        file: The new file, locked and open for appending.
+    """
+    temp_path = f"{path}.tmp"
+    new_file = open(temp_path, "w", encoding="utf-8")
+    fcntl.flock(new_file.fileno(), fcntl.LOCK_EX)
+    for line in lines:
+        new_file.write(line + "\n")
+    new_file.flush()
+    os.fsync(new_file.fileno())
+    os.replace(temp_path, path)
+    return new_file
@@ -5,9 +5,18 @@ absence details in the worksheet.
 """
 
 # Custom Package
-from worktime.worksheets import auth
+from worktime.worksheets import cache
 from worktime.app import utility
 
+# Approved, cancelled and employee ID columns: the status index's key.
+STATUS_COLS = (8, 9, 1)
+# Approved and cancelled values of a request awaiting a decision.
+PENDING = ("/", "False")
+# Employee ID and cancelled columns: the employee index's key.
+EMPLOYEE_COLS = (1, 9)
+# Start date, approved and cancelled columns: the start date index's key.
+START_COLS = (2, 8, 9)
+
 
 class Requests:
     """Represent the absence_requests worksheet.
@@ -26,56 +35,84 @@ class Requests:
         id_ str: An employee ID
     """
 
-    today = utility.GetDatetime().tday_str()
-
     def __init__(self, id_=None):
         self.id_ = id_
-        self.worksheet = auth.SHEET.worksheet("absence_requests")
+        self.worksheet = cache.worksheet("absence_requests")
         self.requests = self.worksheet.get_all_values()[1:]
         self.req_id_col = "A"
         self.duration_col = "G"
         self.approved_col = "I"
         self.cancelled_col = "J"
 
-    def generate_req_id(self):
-        """Increment the request ID by 1.
-        If there hasn't been a request, assign 1 to it.
+    @property
+    def today(self):
+        """str: Today's DD/MM/YYYY date, read from the clock on each use."""
+        return utility.GetDatetime().tday_str()
+
+    def add_request(self, data):
+        """Add new request data to the worksheet under a newly allocated
+        request ID, which stays unique with several terminals booking.
 
+        Args:
+            data list: A list containing request details - request ID
+            (replaced), employee ID, start/end date, start/end time, total
+            number of days, request date, default approved and cancelled
+            values.
         Returns:
-            int: Request ID.
+            str: The request ID.
         """
-        request_id = 1
-        if self.requests:
-            request_id = int([request[0] for request in self.requests][-1]) + 1
-        return request_id
+        req_id, _ = self.worksheet.append_with_id(data)
+        self.requests.append((req_id, *map(str, data[1:])))
+        return req_id
 
-    def add_request(self, data):
-        """Add new request data to the worksheet.
+    def get_row(self, req_id):
+        """Return the 1-based worksheet row of a request, as last read.
+        Writes to it pass the request ID along as the row's key, as the
+        archive may have moved the row since.
 
         Args:
-            data list: A list containing request details - request ID,
-            employee ID, start/end date, start/end time, total number of days,
-            request date, default approved and cancelled values.
+            req_id str: The request ID.
+        Raises:
+            KeyError: If the ID is unknown.
         """
-        self.worksheet.append_row(data, value_input_option='RAW')
+        found = self.worksheet.find((0,), (str(req_id),))
+        if found is None:
+            raise KeyError(f"Unknown request ID: {req_id}")
+        return found[0]
 
-    def update_approved(self, row, action):
-        """Replace False or True with "/" in a approved cell.
+    def update_approved(self, req_id, action):
+        """Replace "/" with True or False in a approved cell.
 
         Args:
-            row int: The index of the target row which starts with 1.
+            req_id str: The request ID.
+            action str: APPROVE or REJECT.
         """
         result = "True" if action == "APPROVE" else "False"
-        (self.worksheet.update(f"{self.approved_col}{row+1}",
-                               f"{result}", raw=True))
+        row = self.get_row(req_id)
+        self.worksheet.update(f"{self.approved_col}{row}", result,
+                              raw=True, key=[str(req_id)])
 
-    def update_cancelled(self, row):
+    def update_cancelled(self, req_id):
         """Replace False with True in a cancelled cell.
 
         Args:
-            row int: The index of the target row.
+            req_id str: The request ID.
         """
-        self.worksheet.update(f"{self.cancelled_col}{row+1}", "True", raw=True)
+        row = self.get_row(req_id)
+        self.worksheet.update(f"{self.cancelled_col}{row}", "True",
+                              raw=True, key=[str(req_id)])
+
+    def get_request(self, req_id):
+        """Look up a request by its ID.
+
+        Args:
+            req_id str: The request ID.
+        Returns:
+            tuple: The request's row values, None if the ID is unknown.
+        """
+        found = self.worksheet.find((0,), (req_id,))
+        if found:
+            return found[1]
 
     def get_today_absence(self):
         """Check if today is the start date of planned absence.
@@ -84,45 +121,54 @@ class Requests:
             list: A list of lists containing the employee ID and duration.
         """
         today_list = []
-        for request in self.requests:
-            if (request[2] == self.today and request[-2] == "True" and
-                    request[-1] == "False"):
-                today_list.append([request[1], request[6]])
+        for request, _ in self.worksheet.select(
+                START_COLS, (self.today, "True", "False")):
+            today_list.append([request[1], request[6]])
         return today_list
 
-    def get_duration(self, row):
-        """Get the total_days column(index 6) of the given row's value.
+    def get_duration(self, req_id):
+        """Get the total_days column(index 6) of the given request's value.
 
         Args:
-            row int: The index of the target row.
+            req_id str: The request ID.
         Returns:
             str: Total days of an absence request.
         """
-        duration = self.requests[row-1][6]
+        duration = self.get_request(str(req_id))[6]
         return duration
 
-    def get_approved(self, row):
-        """Get the approved column(index 8) of the given row's value.
+    def get_approved(self, req_id):
+        """Get the approved column(index 8) of the given request's value.
 
         Args:
-            row int: The index of the target row.
+            req_id str: The request ID.
         Returns:
             str: Value of approved cell - True, False or /.
         """
-        is_approved = self.requests[row-1][8]
+        is_approved = self.get_request(str(req_id))[8]
         return is_approved
 
-    def get_cancelled(self, row):
-        """Get the cancelled column(index 9) of the given row's value.
+    def get_cancelled(self, req_id):
+        """Get the cancelled column(index 9) of the given request's value.
 
         Args:
-            row int: The index of the target row.
+            req_id str: The request ID.
         Returns:
             str: Value of cancelled cell - True or False.
         """
-        is_cancelled = self.requests[row-1][9]
+        is_cancelled = self.get_request(str(req_id))[9]
         return is_cancelled
 
+    def get_pending(self):
+        """Look up the requests awaiting a decision in the status index,
+        which is kept up to date as requests are added and updated.
+
+        Returns:
+            dict: Employee ID to their pending requests, in ID order.
+        """
+        grouped = self.worksheet.groups(STATUS_COLS, PENDING)
+        return {key[2]: grouped[key] for key in sorted(grouped)}
+
     def get_cancellable_absence(self):
         """Retrieve data that meets the condition: start date is in the future,
         not rejected and not cancelled.
@@ -131,10 +177,11 @@ class Requests:
             list: A list of lists containing cancellable absence data.
         """
         cancellable = []
-        today = utility.convert_date(self.today)
-        for request in self.requests:
-            date = utility.convert_date(request[2])
-            if (request[1] == self.id_ and (date - today).days > 0 and
-                    not request[-2] == "False" and request[-1] == "False"):
+        today = utility.to_ordinal(self.today)
+        # Only the employee's requests that are not cancelled are read.
+        for request, (date_, approved) in self.worksheet.select(
+                EMPLOYEE_COLS, (self.id_, "False"), (2, "date"),
+                (8, "status")):
+            if date_ > today and approved != cache.FALSE:
                 cancellable.append(request)
         return cancellable
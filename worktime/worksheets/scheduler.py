@@ -0,0 +1,210 @@
+"""Request Scheduler Module
+
+This module paces every Google Sheets API request of the process. A token
+bucket holds as many requests as the per-minute quota allows and refills
+at the quota's rate, so a burst of clock-ins waits for a token instead of
+being refused by Google. Requests from background work, e.g. recomputing
+entitlements or compacting the clock log, wait while interactive ones are
+queued. A request refused with 429 (quota) or a 5xx status is retried
+after a jittered exponential backoff; appends and spreadsheet batch
+updates only on 429, as they may have been applied before a 5xx.
+Throttles and retries are counted.
+"""
+
+# Built-in Modules
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+import random
+import threading
+import time
+
+# Third-party Packages
+import gspread
+from gspread.exceptions import APIError
+
+# Custom Package
+from worktime import config
+
+# Request priorities: interactive requests are served first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Seconds of the first retry's backoff, and the most a backoff may be.
+BASE_BACKOFF = 1
+MAX_BACKOFF = 32
+
+# Priority of the requests made by the current thread.
+priority = ContextVar("priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background():
+    """Give the Sheets requests made inside the block background priority.
+    Each thread starts with interactive priority.
+    """
+    token = priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        priority.reset(token)
+
+
+def is_retryable(error, idempotent=True):
+    """Check if a refused request may succeed if it is sent again.
+
+    Args:
+        error APIError: The error gspread raised.
+        idempotent bool: False if sending the request twice would apply
+                         it twice.
+    Returns:
+        bool: True for quota (429) errors, which Google returns before
+              applying a request, and for server (5xx) errors of
+              idempotent requests.
+    """
+    status = error.response.status_code
+    return status == 429 or (idempotent and status >= 500)
+
+
+def is_idempotent(endpoint):
+    """Check if a request can be applied twice with the same result.
+    Appends add rows and spreadsheet batch updates, e.g. adding a worksheet,
+    change the sheet each time; value updates set the same values.
+
+    Args:
+        endpoint str: The request's URL.
+    Returns:
+        bool: False for appends and spreadsheet batch updates.
+    """
+    return (endpoint.endswith("/values:batchUpdate") or
+            not endpoint.endswith((":append", ":batchUpdate")))
+
+
+class Scheduler:
+    """Represent the token bucket all Sheets requests take a token from.
+
+    Args:
+        per_minute int: Requests allowed per minute.
+        max_retries int: Times a refused request is sent again.
+    """
+
+    def __init__(self, per_minute, max_retries):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.max_retries = max_retries
+        self.tokens = float(per_minute)
+        self.refilled_at = time.monotonic()
+        self.condition = threading.Condition()
+        # Requests waiting for a token, by priority.
+        self.waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0,
+                      "failures": 0}
+
+    def refill(self):
+        """Add the tokens earned since the last refill, up to capacity."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self, level):
+        """Wait for a token and take it. A background request also waits
+        while interactive ones are queued.
+
+        Args:
+            level int: INTERACTIVE or BACKGROUND.
+        """
+        with self.condition:
+            self.waiting[level] += 1
+            throttled = False
+            try:
+                while True:
+                    self.refill()
+                    blocked = level == BACKGROUND and self.waiting[INTERACTIVE]
+                    if self.tokens >= 1 and not blocked:
+                        self.tokens -= 1
+                        self.stats["requests"] += 1
+                        return
+                    if not throttled:
+                        throttled = True
+                        self.stats["throttled"] += 1
+                    self.condition.wait((1 - self.tokens) / self.rate
+                                        if self.tokens < 1 else None)
+            finally:
+                self.waiting[level] -= 1
+                self.condition.notify_all()
+
+    def count(self, name):
+        """Add one to a counter.
+
+        Args:
+            name str: retries or failures.
+        """
+        with self.condition:
+            self.stats[name] += 1
+
+    def run(self, send, idempotent=True):
+        """Send a request once a token is free, retrying it after a
+        jittered exponential backoff while it is refused with 429/5xx,
+        or with 429 only if it is not idempotent.
+
+        Args:
+            send function: Sends the request and returns the response.
+            idempotent bool: False if sending it twice would apply it twice.
+        Returns:
+            The response.
+        Raises:
+            APIError: If the request is refused for good, or still
+                      refused after max_retries retries.
+        """
+        level = priority.get()
+        for attempt in range(self.max_retries + 1):
+            self.acquire(level)
+            try:
+                return send()
+            except APIError as error:
+                if (not is_retryable(error, idempotent) or
+                        attempt == self.max_retries):
+                    self.count("failures")
+                    raise
+                self.count("retries")
+                time.sleep(backoff(error, attempt))
+
+    def get_stats(self):
+        """Return dict: a copy of the request, throttle, retry and
+        failure counters.
+        """
+        with self.condition:
+            return dict(self.stats)
+
+
+def backoff(error, attempt):
+    """Return float: seconds to wait before a retry. Full jitter spreads
+    retries from several terminals. A Retry-After header is respected.
+
+    Args:
+        error APIError: The error of the refused request.
+        attempt int: The number of the attempt that failed, from 0.
+    """
+    retry_after = error.response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+
+
+@lru_cache(maxsize=None)
+def get_scheduler():
+    """Return Scheduler: the process's scheduler, built once."""
+    return Scheduler(config.SHEETS_QUOTA, config.SHEETS_MAX_RETRIES)
+
+
+class ScheduledClient(gspread.Client):
+    """Represent a gspread client whose requests, reads and writes alike,
+    go through the process's Scheduler.
+    """
+
+    def request(self, method, endpoint, *args, **kwargs):
+        return get_scheduler().run(
+            lambda: super(ScheduledClient, self).request(
+                method, endpoint, *args, **kwargs),
+            is_idempotent(endpoint))